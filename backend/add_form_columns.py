@@ -0,0 +1,37 @@
+"""
+Migration script to add the form_id column to the attempts table and the
+retired flag to the test_forms table
+Run this once to update the database schema; the test_forms table itself is
+created by create_all()
+"""
+from app import create_app
+from models import db
+
+def add_form_columns():
+    app = create_app()
+    
+    with app.app_context():
+        print('Adding form_id column to attempts table and retired column to test_forms...')
+        
+        sql_commands = [
+            "ALTER TABLE attempts ADD COLUMN IF NOT EXISTS form_id INTEGER;",
+            "CREATE INDEX IF NOT EXISTS ix_attempts_form_id ON attempts (form_id);",
+            "ALTER TABLE test_forms ADD COLUMN IF NOT EXISTS retired BOOLEAN NOT NULL DEFAULT FALSE;",
+            "CREATE INDEX IF NOT EXISTS ix_test_forms_role_retired_position ON test_forms (role, retired, position);",
+            "DROP INDEX IF EXISTS ix_test_forms_role_position;"
+        ]
+        
+        try:
+            for sql in sql_commands:
+                db.session.execute(db.text(sql))
+            
+            db.session.commit()
+            print('✓ Successfully added form_id and retired columns')
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f'✗ Error adding columns: {str(e)}')
+            raise
+
+if __name__ == '__main__':
+    add_form_columns()
@@ -0,0 +1,35 @@
+"""
+Migration script to add performance indexes to existing databases
+Run this once after upgrading; fresh databases get them from create_all()
+"""
+from app import create_app
+from models import db
+
+def add_indexes():
+    app = create_app()
+
+    with app.app_context():
+        print('Adding performance indexes...')
+
+        # Works on both PostgreSQL and SQLite
+        sql_commands = [
+            "CREATE INDEX IF NOT EXISTS ix_questions_role_id ON questions (role, id);",
+            # Fails if duplicate attempt numbers already exist; renumber those first
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_attempts_user_attempt_number ON attempts (user_id, attempt_number);",
+            "CREATE INDEX IF NOT EXISTS ix_attempts_user_timestamp ON attempts (user_id, timestamp DESC, id DESC);"
+        ]
+
+        try:
+            for sql in sql_commands:
+                db.session.execute(db.text(sql))
+
+            db.session.commit()
+            print('✓ Successfully added indexes')
+
+        except Exception as e:
+            db.session.rollback()
+            print(f'✗ Error adding indexes: {str(e)}')
+            raise
+
+if __name__ == '__main__':
+    add_indexes()
@@ -3,6 +3,15 @@ from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from models import db
 from seed_questions import seed_database
+import certificate_cache
+import certificate_jobs
+import certificate_pool
+import metrics
+import query_guard
+import question_cache
+import question_forms
+import translation_backfill
+import translation_utils
 import os
 from dotenv import load_dotenv
 
@@ -19,6 +28,11 @@ def create_app(config_class=DevelopmentConfig):
     db.init_app(app)
     CORS(app)
     jwt = JWTManager(app)
+    question_cache.configure(app.config)
+    certificate_cache.configure(app.config)
+    certificate_jobs.configure(app.config)
+    certificate_pool.configure(app.config)
+    translation_utils.configure(app.config)
     
     # Register blueprints
     from routes.auth import auth_bp
@@ -51,9 +65,30 @@ def create_app(config_class=DevelopmentConfig):
     
     # Create tables
     with app.app_context():
+        metrics.init_app(app, db.engine)
+        query_guard.init_app(app, db.engine)
         db.create_all()
         # Ensure questions/admin exist even on fresh deployments
         seed_database(verbose=False)
+        # Rebuild test forms for any role whose question bank changed
+        if app.config.get('QUESTION_SAMPLING') == 'forms':
+            question_forms.rebuild_all_forms(app.config.get('TEST_FORMS_PER_ROLE', 200), only_stale=True)
+        translation_utils.init_translation_memory(
+            db.engine,
+            preload=app.config.get('TRANSLATION_MEMORY_PRELOAD', 0)
+        )
+
+    # Served by /metrics (as gauges) and /api/metrics (as JSON)
+    metrics.register_collector('question_cache', question_cache.stats)
+    metrics.register_collector('translation_cache', translation_utils.stats)
+    metrics.register_collector('translation_backfill', translation_backfill.progress)
+    metrics.register_collector('certificate_cache', certificate_cache.stats)
+    metrics.register_collector('certificate_jobs', certificate_jobs.stats)
+    metrics.register_collector('certificate_pool', certificate_pool.stats)
+
+    # Fill missing Urdu translations off the request path
+    if app.config.get('TRANSLATION_BACKFILL_ON_STARTUP'):
+        translation_backfill.start_backfill(app)
     
     return app
 
@@ -0,0 +1,168 @@
+"""
+Denormalized per-user attempt summaries.
+
+``attempt_summaries`` holds one row per user with the attempt count, whether the
+user has passed, the last and latest passed attempt and the best score, so the
+test endpoints read a single row by primary key instead of counting attempts.
+The row is updated in the same transaction as each attempt insert.
+
+Users without a row (e.g. from before this table existed) get one built from
+their attempts on first use. Build rows for everyone up front with:
+
+    python attempt_summary.py
+"""
+from datetime import datetime
+
+from sqlalchemy import update
+
+from models import db, Attempt, AttemptSummary, User
+
+
+def _fold(summary, attempt_id, score, passed, timestamp):
+    """Account for one more attempt in ``summary``."""
+    summary.attempt_count = (summary.attempt_count or 0) + 1
+    if summary.best_score is None or score > summary.best_score:
+        summary.best_score = score
+    if summary.last_attempt_at is None or (timestamp, attempt_id) >= (summary.last_attempt_at, summary.last_attempt_id or 0):
+        summary.last_attempt_id = attempt_id
+        summary.last_attempt_at = timestamp
+    if passed:
+        summary.has_passed = True
+        # Attempts arrive in chronological order, so the newest pass wins
+        summary.passed_attempt_id = attempt_id
+
+
+def _empty(user_id):
+    return AttemptSummary(
+        user_id=user_id,
+        attempt_count=0,
+        has_passed=False,
+        updated_at=datetime.utcnow()
+    )
+
+
+def build_summary(user_id):
+    """Compute a summary from the user's attempts without adding it to the session."""
+    summary = _empty(user_id)
+    rows = (
+        db.session.query(Attempt.id, Attempt.score, Attempt.passed, Attempt.timestamp)
+        .filter(Attempt.user_id == user_id)
+        .order_by(Attempt.timestamp, Attempt.id)
+        .all()
+    )
+    for row in rows:
+        _fold(summary, row.id, row.score, row.passed, row.timestamp)
+    return summary
+
+
+def get_summary(user_id, create=False, for_update=False):
+    """Return the user's summary row.
+
+    When the row is missing it is built from the attempts table. With
+    ``create=True`` the built row is added to the session so the caller's commit
+    persists it; otherwise a transient object is returned for reading.
+    ``for_update=True`` locks the row until the caller's transaction ends.
+    """
+    if for_update:
+        # Touching the row takes its row lock on PostgreSQL and the database write
+        # lock on SQLite (which has no SELECT ... FOR UPDATE), so concurrent
+        # writers for the same user queue here instead of racing.
+        db.session.execute(
+            update(AttemptSummary)
+            .where(AttemptSummary.user_id == user_id)
+            .values(updated_at=datetime.utcnow())
+        )
+        summary = (
+            db.session.query(AttemptSummary)
+            .filter(AttemptSummary.user_id == user_id)
+            .populate_existing()
+            .first()
+        )
+    else:
+        summary = db.session.get(AttemptSummary, user_id)
+    if summary is None:
+        summary = build_summary(user_id)
+        if create:
+            db.session.add(summary)
+    return summary
+
+
+def record_attempt(summary, attempt):
+    """Update ``summary`` for a newly flushed ``attempt``."""
+    _fold(summary, attempt.id, attempt.score, attempt.passed, attempt.timestamp)
+
+
+def reset(summary):
+    """Clear ``summary`` after the user's attempts were deleted."""
+    summary.attempt_count = 0
+    summary.has_passed = False
+    summary.passed_attempt_id = None
+    summary.last_attempt_id = None
+    summary.last_attempt_at = None
+    summary.best_score = None
+
+
+def backfill_summaries(batch_size=1000, verbose=False):
+    """Build summary rows for every user that does not have one yet.
+
+    Streams attempts once in (user, time) order and bulk-inserts the results, so
+    it scales linearly with the attempts table. Returns the number of rows written.
+    """
+    missing_users = (
+        db.session.query(User.id)
+        .outerjoin(AttemptSummary, AttemptSummary.user_id == User.id)
+        .filter(AttemptSummary.user_id.is_(None))
+        .subquery()
+    )
+    attempts = (
+        db.session.query(Attempt.user_id, Attempt.id, Attempt.score, Attempt.passed, Attempt.timestamp)
+        .join(missing_users, missing_users.c.id == Attempt.user_id)
+        .order_by(Attempt.user_id, Attempt.timestamp, Attempt.id)
+        .yield_per(batch_size)
+    )
+
+    summaries = {}
+    for row in attempts:
+        summary = summaries.get(row.user_id)
+        if summary is None:
+            summary = summaries[row.user_id] = _empty(row.user_id)
+        _fold(summary, row.id, row.score, row.passed, row.timestamp)
+
+    # Users with no attempts still get a (zero) row so every lookup is a PK hit
+    for (user_id,) in db.session.query(missing_users.c.id).all():
+        summaries.setdefault(user_id, _empty(user_id))
+
+    rows = [
+        {
+            'user_id': summary.user_id,
+            'attempt_count': summary.attempt_count,
+            'has_passed': summary.has_passed,
+            'passed_attempt_id': summary.passed_attempt_id,
+            'last_attempt_id': summary.last_attempt_id,
+            'last_attempt_at': summary.last_attempt_at,
+            'best_score': summary.best_score,
+            'updated_at': summary.updated_at
+        }
+        for summary in summaries.values()
+    ]
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(AttemptSummary.__table__.insert(), rows[start:start + batch_size])
+        db.session.commit()
+        if verbose:
+            print(f'  {min(start + batch_size, len(rows))}/{len(rows)} summaries written')
+
+    return len(rows)
+
+
+def main():
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        print('Backfilling attempt summaries...')
+        written = backfill_summaries(verbose=True)
+        print(f'✓ Built {written} attempt summaries')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: building a questions response with jsonify vs. pre-encoded fragments
+
+Run from the backend directory:
+    python -m benchmarks.question_payload --iterations 20000
+"""
+import argparse
+import random
+import time
+
+from flask import Flask, jsonify
+
+import question_cache
+from models import serialize_question
+from question_cache import QuestionRecord
+
+
+def make_records(count):
+    records = []
+    for i in range(1, count + 1):
+        records.append(QuestionRecord(
+            id=i,
+            role='Cleaner',
+            question_text=f'How should the work area be made safe while cleaning? ({i})',
+            option_a='Do not inform anyone',
+            option_b='Place a sign like "Wet Floor" or "Cleaning in Progress"',
+            option_c='Work quietly',
+            option_d='Only sweep the floor',
+            correct_option='B',
+            question_text_ur='صفائی کے دوران کام کی جگہ کو کیسے محفوظ بنایا جائے؟',
+            option_a_ur='کسی کو اطلاع نہ دیں',
+            option_b_ur='"گیلا فرش" جیسا نشان لگائیں',
+            option_c_ur='خاموشی سے کام کریں',
+            option_d_ur='صرف فرش جھاڑیں'
+        ))
+    return records
+
+
+def run_jsonify(app, pool, language, iterations):
+    with app.test_request_context():
+        started = time.perf_counter()
+        for _ in range(iterations):
+            selected = random.sample(pool, 10)
+            jsonify({
+                'questions': [serialize_question(q, include_answer=False, language=language) for q in selected],
+                'language': language
+            }).get_data()
+        return time.perf_counter() - started
+
+
+def run_fragments(app, pool, language, iterations):
+    with app.test_request_context():
+        started = time.perf_counter()
+        for _ in range(iterations):
+            selected = random.sample(pool, 10)
+            body = b''.join([
+                b'{"language":"', language.encode('utf-8'), b'","questions":',
+                question_cache.encode_questions(selected, language),
+                b'}'
+            ])
+            app.response_class(body, mimetype='application/json').get_data()
+        return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--pool-size', type=int, default=20)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    pool = make_records(args.pool_size)
+
+    for language in ('en', 'ur'):
+        baseline = run_jsonify(app, pool, language, args.iterations)
+        fragments = run_fragments(app, pool, language, args.iterations)
+        print(f'[{language}] jsonify:   {args.iterations / baseline:10.0f} responses/s '
+              f'({baseline / args.iterations * 1e6:.1f} us each)')
+        print(f'[{language}] fragments: {args.iterations / fragments:10.0f} responses/s '
+              f'({fragments / args.iterations * 1e6:.1f} us each, {baseline / fragments:.1f}x faster)')
+
+
+if __name__ == '__main__':
+    main()
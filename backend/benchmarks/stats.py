@@ -0,0 +1,20 @@
+"""Measurement helpers shared by the benchmark scripts."""
+import math
+import resource
+import sys
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    # The smallest value with at least pct% of the values at or below it
+    index = math.ceil(pct * len(sorted_values) / 100.0) - 1
+    return sorted_values[min(max(index, 0), len(sorted_values) - 1)]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
@@ -0,0 +1,254 @@
+"""
+Benchmark suite for the hot paths on a synthetic dataset
+
+Micro benchmarks call the code directly (Question.to_dict, answer scoring,
+certificate rendering); macro benchmarks go through the WSGI app (questions,
+admin analytics, admin user list). Run from the backend directory:
+    python -m benchmarks.suite --users 1000 --attempts 10000 --output results.json
+    python -m benchmarks.suite --baseline results.json --threshold 0.15
+
+The dataset comes from generate_dataset.py; it is generated once per database
+and reused by later runs of the same size (so the database must be a file or a
+server, not in-memory SQLite). Each benchmark runs ``--repeats`` times and
+reports the fastest run's ops/s and p50/p95/p99 latency (and, for
+certificate_pdf, the size of the PDF it produced). Every benchmark runs in a
+fresh process, so its peak RSS is its own; the report also gives how much the
+benchmark raised it above the loaded app. With ``--baseline`` a benchmark whose
+ops/s dropped by more than the threshold is reported as a regression and the
+exit status is 1.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import time
+
+from benchmarks.stats import peak_rss_mb, percentile
+from config import TestingConfig
+
+DEFAULT_DATABASE = 'sqlite:////tmp/skill_certification_bench.db'
+BENCHMARKS = ('question_to_dict', 'get_questions', 'score_answers', 'certificate_pdf', 'analytics', 'list_users')
+
+
+def make_config(database):
+    class BenchmarkConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = database
+        QUERY_GUARD = 'off'
+        QUESTION_SAMPLING = 'forms'
+
+    return BenchmarkConfig
+
+
+def dataset_size():
+    """Return ``(users, attempts)`` currently in the database (admins excluded)."""
+    from models import Attempt, User
+
+    return User.query.filter_by(is_admin=False).count(), Attempt.query.count()
+
+
+def measure(operation, min_time, max_time, min_iterations=5, warmup=1):
+    """Call ``operation`` for ``min_time`` seconds and at least ``min_iterations`` times.
+
+    Slow operations stop after ``max_time`` seconds regardless. An operation may
+    return a dict of extra figures (sizes, counts) to report with the timings.
+    """
+    for _ in range(warmup):
+        operation()
+    latencies = []
+    extra = None
+    started = time.perf_counter()
+    while True:
+        elapsed = time.perf_counter() - started
+        if elapsed >= max_time or (len(latencies) >= min_iterations and elapsed >= min_time):
+            break
+        op_started = time.perf_counter()
+        extra = operation()
+        latencies.append(time.perf_counter() - op_started)
+    total = time.perf_counter() - started
+    ordered = sorted(latencies)
+    return {
+        'iterations': len(ordered),
+        'ops_per_sec': len(ordered) / total,
+        'p50_ms': percentile(ordered, 50) * 1000,
+        'p95_ms': percentile(ordered, 95) * 1000,
+        'p99_ms': percentile(ordered, 99) * 1000,
+        **(extra or {}),
+    }
+
+
+def make_operations(app, names):
+    """Return ``{name: operation}`` for the selected benchmarks."""
+    from flask_jwt_extended import create_access_token
+
+    from models import Question, User
+    from routes.certificate import generate_certificate_pdf
+    from routes.test import score_answers
+
+    rng = random.Random(1)
+    client = app.test_client()
+    questions = Question.query.all()
+    answer_keys = {question.id: question.correct_option for question in questions}
+    admin = User.query.filter_by(is_admin=True).first()
+    candidates = User.query.filter_by(is_admin=False).order_by(User.id).limit(100).all()
+    admin_headers = {'Authorization': f'Bearer {create_access_token(identity=str(admin.id))}'}
+    candidate_requests = [
+        (f'/api/test/questions/{user.role}', {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'})
+        for user in candidates
+    ]
+
+    def question_to_dict():
+        for question in rng.sample(questions, 10):
+            question.to_dict(language='ur')
+
+    def get_questions():
+        path, headers = rng.choice(candidate_requests)
+        response = client.get(path, query_string={'lang': 'ur'}, headers=headers)
+        assert response.status_code == 200, response.status_code
+
+    def score():
+        selected = rng.sample(questions, 10)
+        score_answers({str(question.id): rng.choice([answer_keys[question.id], 'A']) for question in selected})
+
+    def certificate_pdf():
+        pdf = generate_certificate_pdf('Benchmark Candidate', 'Electrician', 9, 'January 01, 2026')
+        return {'bytes': len(pdf.getvalue())}
+
+    def analytics():
+        response = client.get('/api/admin/analytics', headers=admin_headers)
+        assert response.status_code == 200, response.status_code
+
+    def list_users():
+        response = client.get('/api/admin/users', headers=admin_headers)
+        assert response.status_code == 200, response.status_code
+
+    operations = {
+        'question_to_dict': question_to_dict,
+        'get_questions': get_questions,
+        'score_answers': score,
+        'certificate_pdf': certificate_pdf,
+        'analytics': analytics,
+        'list_users': list_users,
+    }
+    return {name: operations[name] for name in names}
+
+
+def run_benchmark(database, name, min_time, max_time, repeats):
+    """Build the app and run benchmark ``name``; meant to run in a fresh process.
+
+    Keeps the fastest of ``repeats`` runs and adds the process peak RSS, and how
+    far the benchmark raised it above the app and data loaded before it.
+    """
+    from app import create_app
+
+    app = create_app(make_config(database))
+    with app.app_context():
+        operation = make_operations(app, [name])[name]
+        before = peak_rss_mb()
+        # Keep the fastest of several runs; slower ones mostly measure machine noise
+        runs = [measure(operation, min_time, max_time) for _ in range(repeats)]
+        result = max(runs, key=lambda run: run['ops_per_sec'])
+        result['peak_rss_mb'] = peak_rss_mb()
+        result['rss_delta_mb'] = result['peak_rss_mb'] - before
+    return result
+
+
+def compare(results, baseline, threshold):
+    """Print the change per benchmark and return the names that regressed."""
+    regressions = []
+    for name, current in results['benchmarks'].items():
+        previous = baseline.get('benchmarks', {}).get(name)
+        if previous is None:
+            continue
+        ops_change = current['ops_per_sec'] / previous['ops_per_sec'] - 1 if previous['ops_per_sec'] else 0.0
+        p95_change = current['p95_ms'] / previous['p95_ms'] - 1 if previous['p95_ms'] else 0.0
+        flag = ''
+        # p95 is shown for context; with few iterations it is too noisy to gate on
+        if ops_change < -threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        size = ''
+        if current.get('bytes') and previous.get('bytes'):
+            size = f"   bytes {current['bytes'] / previous['bytes'] - 1:+7.1%}"
+        print(f'{name:<18} ops/s {ops_change:+7.1%}   p95 {p95_change:+7.1%}{size}{flag}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--attempts', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=1, help='dataset generator seed')
+    parser.add_argument('--database', default=os.getenv('BENCHMARK_DATABASE_URL', DEFAULT_DATABASE))
+    parser.add_argument('--only', nargs='+', choices=BENCHMARKS, help='run only these benchmarks')
+    parser.add_argument('--min-time', type=float, default=2.0, help='seconds to run each benchmark for')
+    parser.add_argument('--max-time', type=float, default=30.0,
+                        help='stop a benchmark after this many seconds even if it is slow')
+    parser.add_argument('--repeats', type=int, default=3, help='runs per benchmark; the fastest is kept')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--baseline', help='compare against results from an earlier run')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='relative slowdown that counts as a regression (default 0.15)')
+    args = parser.parse_args()
+
+    from app import create_app
+    from generate_dataset import generate_dataset
+    from models import db
+
+    app = create_app(make_config(args.database))
+    with app.app_context():
+        size = dataset_size()
+        if size != (args.users, args.attempts):
+            if size != (0, 0):
+                print(f'Database holds {size[0]} users / {size[1]} attempts; '
+                      f'use an empty database for {args.users} / {args.attempts}')
+                return 2
+            print(f'Generating dataset: {args.users} users, {args.attempts} attempts (seed {args.seed})')
+            started = time.perf_counter()
+            generate_dataset(args.users, args.attempts, seed=args.seed, verbose=True)
+            print(f'  built in {time.perf_counter() - started:.1f}s')
+
+        results = {
+            'created_at': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'database': db.engine.url.get_backend_name(),
+            'dataset': {'users': args.users, 'attempts': args.attempts, 'seed': args.seed},
+            'benchmarks': {},
+        }
+
+    context = multiprocessing.get_context('spawn')
+    for name in args.only or BENCHMARKS:
+        # A fresh process per benchmark: ru_maxrss never goes down, so in one
+        # process every benchmark would report the peak of the ones before it
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            result = executor.submit(
+                run_benchmark, args.database, name, args.min_time, args.max_time, args.repeats
+            ).result()
+        results['benchmarks'][name] = result
+        print(f"{name:<18} {result['ops_per_sec']:>10.1f} ops/s   p50 {result['p50_ms']:8.2f} ms   "
+              f"p95 {result['p95_ms']:8.2f} ms   p99 {result['p99_ms']:8.2f} ms   "
+              f"peak RSS {result['peak_rss_mb']:.0f} MB (+{result['rss_delta_mb']:.0f})"
+              + (f"   {result['bytes']} bytes" if 'bytes' in result else ''))
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(results, handle, indent=2)
+        print(f'Results written to {args.output}')
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        if baseline.get('dataset') != results['dataset']:
+            print(f"Warning: baseline used dataset {baseline.get('dataset')}")
+        print(f'\nCompared with {args.baseline} (threshold {args.threshold:.0%}):')
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+Content-addressed on-disk cache of rendered certificate PDFs.
+
+A certificate only depends on the holder's name, role, score and pass date, and
+on the template that draws it. ``cache_key`` hashes exactly those inputs (plus
+``TEMPLATE_VERSION`` from routes/certificate.py), so the key doubles as a strong
+ETag: the same key always names the same bytes, and any change to an input
+names a different file. Nothing ever needs invalidating; stale files simply
+stop being requested and are evicted, least recently used first, once the
+directory grows past ``CERTIFICATE_CACHE_MAX_MB``.
+
+Files are written to a temporary name and renamed into place, so concurrent
+renders of one certificate (or several workers sharing the directory) never
+expose a partial PDF.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Callable, Optional, Tuple
+
+_lock = threading.Lock()
+_directory = os.path.join(tempfile.gettempdir(), 'skill-certification-certificates')
+_max_bytes = 256 * 1024 * 1024
+_total_bytes = None  # estimated size of the directory, scanned lazily
+_stats = {
+    'hits': 0,
+    'misses': 0,
+    'evictions': 0,
+    'write_errors': 0,
+}
+
+SUFFIX = '.pdf'
+
+
+def configure(config) -> None:
+    """Apply cache settings from the Flask config."""
+    global _directory, _max_bytes, _total_bytes
+    _directory = config.get('CERTIFICATE_CACHE_DIR') or _directory
+    _max_bytes = int(float(config.get('CERTIFICATE_CACHE_MAX_MB', _max_bytes / (1024 * 1024))) * 1024 * 1024)
+    _total_bytes = None
+
+
+def cache_key(template_version, user_name, role, score, date) -> str:
+    """Hash of every input that affects the rendered certificate."""
+    payload = json.dumps([template_version, user_name, role, score, date], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _path(key: str) -> str:
+    # Two-level fan-out keeps directories small with many certificates
+    return os.path.join(_directory, key[:2], key + SUFFIX)
+
+
+def _scan():
+    """Return ``[(mtime, size, path)]`` for every cached file."""
+    entries = []
+    if not os.path.isdir(_directory):
+        return entries
+    for shard in os.scandir(_directory):
+        if not shard.is_dir():
+            continue
+        for entry in os.scandir(shard.path):
+            if entry.name.endswith(SUFFIX):
+                try:
+                    info = entry.stat()
+                except FileNotFoundError:
+                    continue  # evicted by another worker meanwhile
+                entries.append((info.st_mtime, info.st_size, entry.path))
+    return entries
+
+
+def contains(key: str) -> bool:
+    """Whether ``key`` is cached, without counting as a lookup or use."""
+    return os.path.exists(_path(key))
+
+
+def get(key: str) -> Optional[str]:
+    """Return the path of the cached PDF for ``key``, or None."""
+    path = _path(key)
+    try:
+        # Bump the mtime so eviction sees this file as recently used
+        os.utime(path)
+    except FileNotFoundError:
+        with _lock:
+            _stats['misses'] += 1
+        return None
+    with _lock:
+        _stats['hits'] += 1
+    return path
+
+
+def put(key: str, data: bytes) -> Optional[str]:
+    """Store ``data`` under ``key`` and return its path (None if the write failed)."""
+    global _total_bytes
+    path = _path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                temp_file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    except OSError as exc:
+        logging.warning('Could not cache certificate %s: %s', key, exc)
+        with _lock:
+            _stats['write_errors'] += 1
+        return None
+
+    with _lock:
+        if _total_bytes is not None:
+            _total_bytes += len(data)
+        over_limit = _total_bytes is None or _total_bytes > _max_bytes
+    if over_limit:
+        evict()
+    return path
+
+
+def evict() -> int:
+    """Delete least recently used files until the cache is under 90% of its limit.
+
+    Returns the number of files removed.
+    """
+    global _total_bytes
+    entries = _scan()
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    if total > _max_bytes:
+        target = _max_bytes * 0.9
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+    with _lock:
+        _total_bytes = total
+        _stats['evictions'] += removed
+    return removed
+
+
+def get_or_render(key: str, render: Callable[[], bytes]) -> Tuple[Optional[str], Optional[bytes]]:
+    """Return ``(path, None)`` for a cached PDF, or render it.
+
+    On a miss the rendered bytes are stored and returned as well, so the caller
+    can still serve them if the cache directory is not writable.
+    """
+    path = get(key)
+    if path is not None:
+        return path, None
+    data = render()
+    return put(key, data), data
+
+
+def stats() -> dict:
+    """Return hit/miss/eviction counters for the metrics endpoints."""
+    with _lock:
+        lookups = _stats['hits'] + _stats['misses']
+        return {
+            **_stats,
+            'hit_ratio': (_stats['hits'] / lookups) if lookups else 0.0,
+            'bytes': _total_bytes or 0,
+            'max_bytes': _max_bytes,
+        }
@@ -0,0 +1,123 @@
+"""
+Background rendering of certificates at pass time.
+
+When ``submit_test`` records a passing attempt it enqueues the certificate, and a
+small pool of daemon threads renders it (through ``certificate_pool``) into
+``certificate_cache``. By the time the candidate clicks download, the endpoint
+normally just serves the cached file. A download that beats its job (or whose
+job was dropped because the queue was full, or lost in a restart) renders
+inline exactly as before, and the job then finds the file cached and skips it.
+
+The queue is in-process and bounded (``CERTIFICATE_RENDER_QUEUE_SIZE``); no
+broker is involved. Each app process runs its own ``CERTIFICATE_RENDER_THREADS``
+workers, started on the first job.
+"""
+import logging
+import queue
+import threading
+
+import certificate_cache
+import certificate_pool
+from routes.certificate import TEMPLATE_VERSION
+
+_lock = threading.Lock()
+_queue = None
+_threads = []
+_pending = set()  # cache keys queued or rendering, so repeats are not queued twice
+_enabled = True
+_thread_count = 1
+_queue_size = 1000
+_stats = {
+    'queued': 0,
+    'rendered': 0,
+    'already_cached': 0,
+    'failed': 0,
+    'dropped': 0,
+}
+
+
+def configure(config) -> None:
+    """Apply the pre-rendering settings from the Flask config."""
+    global _enabled, _thread_count, _queue_size
+    _enabled = bool(config.get('CERTIFICATE_PRERENDER', True))
+    _thread_count = max(int(config.get('CERTIFICATE_RENDER_THREADS', 1)), 1)
+    _queue_size = max(int(config.get('CERTIFICATE_RENDER_QUEUE_SIZE', 1000)), 1)
+
+
+def _start_workers():
+    # Caller holds _lock
+    global _queue
+    if _queue is None:
+        _queue = queue.Queue(maxsize=_queue_size)
+    _threads[:] = [thread for thread in _threads if thread.is_alive()]
+    while len(_threads) < _thread_count:
+        thread = threading.Thread(
+            target=_worker, name=f'certificate-render-{len(_threads) + 1}', daemon=True
+        )
+        thread.start()
+        _threads.append(thread)
+
+
+def enqueue(user_name, role, score, date) -> bool:
+    """Queue a certificate for rendering. Returns False if it was not queued.
+
+    Never raises: a certificate that is not pre-rendered is rendered on download.
+    """
+    if not _enabled:
+        return False
+    key = certificate_cache.cache_key(TEMPLATE_VERSION, user_name, role, score, date)
+    with _lock:
+        if key in _pending:
+            return False
+        _start_workers()
+        try:
+            _queue.put_nowait((key, user_name, role, score, date))
+        except queue.Full:
+            _stats['dropped'] += 1
+            return False
+        _pending.add(key)
+        _stats['queued'] += 1
+    return True
+
+
+def _worker():
+    while True:
+        key, *fields = _queue.get()
+        try:
+            _render(key, fields)
+        finally:
+            with _lock:
+                _pending.discard(key)
+            _queue.task_done()
+
+
+def _render(key, fields):
+    if certificate_cache.contains(key):
+        outcome = 'already_cached'
+    else:
+        try:
+            # Wait for a render slot rather than being turned away like a download
+            data = certificate_pool.render(*fields, block=True)
+        except Exception:
+            logging.exception('Certificate pre-render failed')
+            outcome = 'failed'
+        else:
+            outcome = 'rendered' if certificate_cache.put(key, data) else 'failed'
+    with _lock:
+        _stats[outcome] += 1
+
+
+def wait() -> None:
+    """Block until every queued certificate has been rendered (scripts and benchmarks)."""
+    if _queue is not None:
+        _queue.join()
+
+
+def stats() -> dict:
+    """Return queue counters for the metrics endpoints."""
+    with _lock:
+        return {
+            **_stats,
+            'pending': len(_pending),
+            'workers': sum(1 for thread in _threads if thread.is_alive()),
+        }
@@ -0,0 +1,165 @@
+"""
+Process pool for certificate rendering.
+
+ReportLab is pure Python, so a render holds the GIL for its whole duration and
+stalls every other request thread in the process. With
+``CERTIFICATE_RENDER_PROCESSES`` above zero, renders run in a
+``ProcessPoolExecutor`` instead and the calling thread just waits on the result,
+which lets renders use other cores while the API threads keep serving. The pool
+is per app process, so size it with the number of app workers in mind.
+
+The pool is bounded: at most ``CERTIFICATE_RENDER_MAX_PENDING`` renders may be
+running or queued. Beyond that ``render`` raises ``RenderPoolSaturated`` straight
+away (the download answers 503 with Retry-After) rather than letting requests
+pile up behind the workers. Background jobs pass ``block=True`` and wait for a
+slot instead.
+
+Workers are started with ``spawn`` (forking a process that runs request and job
+threads is not safe) on the first render, and each warms up the watermark once.
+"""
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+import logging
+import multiprocessing
+import threading
+import time
+
+import metrics
+
+_lock = threading.Lock()
+_executor = None
+_slots = None
+_in_use = 0  # slots taken: renders running or queued in the pool
+_processes = 0
+_max_pending = 0
+_timeout = 30.0
+_stats = {
+    'rendered': 0,
+    'rejected': 0,
+    'timeouts': 0,
+    'restarts': 0,
+}
+
+
+class RenderPoolSaturated(Exception):
+    """Every render slot is taken; the caller should retry later."""
+
+
+def configure(config) -> None:
+    """Apply the pool settings from the Flask config (restarting the pool if it runs)."""
+    global _processes, _max_pending, _timeout, _slots
+    _processes = max(int(config.get('CERTIFICATE_RENDER_PROCESSES', 0)), 0)
+    _max_pending = max(int(config.get('CERTIFICATE_RENDER_MAX_PENDING') or _processes * 4), 1)
+    _timeout = float(config.get('CERTIFICATE_RENDER_TIMEOUT', 30))
+    _slots = threading.BoundedSemaphore(_max_pending)
+    shutdown()
+
+
+def shutdown() -> None:
+    """Stop the worker processes (they are started again by the next render)."""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _warm_up():
+    # Encode the watermark before the first render rather than during it
+    from routes.certificate import _load_watermark
+
+    _load_watermark()
+
+
+def _render_in_worker(user_name, role, score, date):
+    # Imported here: routes.certificate imports this module
+    from routes.certificate import generate_certificate_pdf
+
+    started = time.perf_counter()
+    data = generate_certificate_pdf(user_name, role, score, date).getvalue()
+    return data, time.perf_counter() - started
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=_processes,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_warm_up
+            )
+        return _executor
+
+
+def _count_in_use(delta):
+    global _in_use
+    with _lock:
+        _in_use += delta
+
+
+def _submit(fields, slots):
+    def release_slot(_future=None):
+        # Release into the semaphore the slot came from, even if configure()
+        # has replaced it since
+        _count_in_use(-1)
+        slots.release()
+
+    _count_in_use(1)
+    try:
+        future = _get_executor().submit(_render_in_worker, *fields)
+    except BaseException:
+        release_slot()
+        raise
+    # The slot is held until the worker is done, even if the caller gave up waiting
+    future.add_done_callback(release_slot)
+    return future
+
+
+def render(user_name, role, score, date, block=False) -> bytes:
+    """Render a certificate and return the PDF bytes.
+
+    Runs in the calling thread when the pool is disabled. Raises
+    ``RenderPoolSaturated`` when no slot is free (unless ``block``) or the
+    render does not finish within ``CERTIFICATE_RENDER_TIMEOUT``.
+    """
+    fields = (user_name, role, score, date)
+    if _processes == 0:
+        return _render_in_worker(*fields)[0]
+
+    slots = _slots
+    if not slots.acquire(blocking=block):
+        with _lock:
+            _stats['rejected'] += 1
+        raise RenderPoolSaturated()
+    try:
+        data, seconds = _submit(fields, slots).result(timeout=_timeout)
+    except FutureTimeout:
+        with _lock:
+            _stats['timeouts'] += 1
+        raise RenderPoolSaturated()
+    except BrokenProcessPool:
+        # A worker died (killed, out of memory): start a fresh pool for the
+        # next render and do this one here
+        logging.exception('Certificate render pool broke; restarting it')
+        with _lock:
+            _stats['restarts'] += 1
+        shutdown()
+        return _render_in_worker(*fields)[0]
+
+    # The worker's own metrics stay in the worker; record the render here
+    metrics.observe('certificate_render_seconds', seconds, 'Time spent rendering certificate PDFs.')
+    with _lock:
+        _stats['rendered'] += 1
+    return data
+
+
+def stats() -> dict:
+    """Return pool counters for the metrics endpoints."""
+    with _lock:
+        return {
+            **_stats,
+            'processes': _processes,
+            'max_pending': _max_pending,
+            'pending': _in_use,
+        }
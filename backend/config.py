@@ -31,10 +31,99 @@ class Config:
     EMAILJS_PUBLIC_KEY = os.getenv('EMAILJS_PUBLIC_KEY')
     EMAILJS_PRIVATE_KEY = os.getenv('EMAILJS_PRIVATE_KEY')
     EMAILJS_ORIGIN = os.getenv('EMAILJS_ORIGIN', 'http://localhost')
+    # Log contact messages instead of sending them (offline runs and load tests)
+    EMAILJS_FAKE = os.getenv('EMAILJS_FAKE', 'false').lower() == 'true'
+
+    # Question pool cache (seconds before a role's pool is reloaded even without
+    # an explicit invalidation, to pick up edits made by other processes)
+    QUESTION_CACHE_TTL = int(os.getenv('QUESTION_CACHE_TTL', '300'))
+    # 'forms' serves precomputed forms (falling back to 'cache' until they are
+    # built); 'cache' samples from the in-memory pool; 'database' reads only the
+    # sampled rows, which suits roles with very large question banks
+    QUESTION_SAMPLING = os.getenv('QUESTION_SAMPLING', 'forms')
+    TEST_FORMS_PER_ROLE = int(os.getenv('TEST_FORMS_PER_ROLE', '200'))
+
+    # Translate missing Urdu question text in a background thread at startup. Off by
+    # default: every worker and maintenance script builds the app; run the backfill
+    # with `python translation_backfill.py` or POST /api/admin/translations/backfill
+    TRANSLATION_BACKFILL_ON_STARTUP = os.getenv('TRANSLATION_BACKFILL_ON_STARTUP', 'false').lower() == 'true'
+
+    # In-process LRU in front of the shared translation_memory table, and how many
+    # stored translations to load into it at startup
+    TRANSLATION_CACHE_SIZE = int(os.getenv('TRANSLATION_CACHE_SIZE', '2048'))
+    TRANSLATION_MEMORY_PRELOAD = int(os.getenv('TRANSLATION_MEMORY_PRELOAD', '2048'))
+    # Seconds to keep a successful translation in the LRU, and to remember a failed
+    # one (doubling on each repeated failure, up to the maximum)
+    TRANSLATION_CACHE_TTL = int(os.getenv('TRANSLATION_CACHE_TTL', '86400'))
+    TRANSLATION_FAILURE_TTL = int(os.getenv('TRANSLATION_FAILURE_TTL', '30'))
+    TRANSLATION_FAILURE_TTL_MAX = int(os.getenv('TRANSLATION_FAILURE_TTL_MAX', '900'))
+
+    # Translator backend ('google' or 'fake' for offline load tests), per-call timeout,
+    # total translator time allowed per request, and circuit breaker that serves
+    # English after repeated failures (all in seconds). The fake provider's latency,
+    # failure rate and random seed (set it to make its failures reproducible)
+    TRANSLATION_PROVIDER = os.getenv('TRANSLATION_PROVIDER', 'google')
+    TRANSLATION_FAKE_LATENCY = float(os.getenv('TRANSLATION_FAKE_LATENCY', '0'))
+    TRANSLATION_FAKE_FAILURE_RATE = float(os.getenv('TRANSLATION_FAKE_FAILURE_RATE', '0'))
+    TRANSLATION_FAKE_SEED = int(os.getenv('TRANSLATION_FAKE_SEED')) if os.getenv('TRANSLATION_FAKE_SEED') else None
+    TRANSLATION_CALL_TIMEOUT = float(os.getenv('TRANSLATION_CALL_TIMEOUT', '5'))
+    TRANSLATION_REQUEST_BUDGET = float(os.getenv('TRANSLATION_REQUEST_BUDGET', '10'))
+    TRANSLATION_BREAKER_THRESHOLD = int(os.getenv('TRANSLATION_BREAKER_THRESHOLD', '5'))
+    TRANSLATION_BREAKER_RESET = float(os.getenv('TRANSLATION_BREAKER_RESET', '30'))
+
+    # POST /api/translate/texts: concurrent translator calls and overall deadline (seconds)
+    TRANSLATION_BATCH_WORKERS = int(os.getenv('TRANSLATION_BATCH_WORKERS', '8'))
+    TRANSLATION_BATCH_TIMEOUT = float(os.getenv('TRANSLATION_BATCH_TIMEOUT', '10'))
+
+    # Idempotency-Key replay window, how long an in-flight request holds its key
+    # before a retry may take it over, and how often expired keys are swept (seconds)
+    IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', '86400'))
+    IDEMPOTENCY_LEASE = int(os.getenv('IDEMPOTENCY_LEASE', '60'))
+    IDEMPOTENCY_PURGE_INTERVAL = int(os.getenv('IDEMPOTENCY_PURGE_INTERVAL', '300'))
+
+    # Rendered certificate PDFs (content-addressed; default: a directory under the
+    # system temp dir) and the size at which least recently used files are evicted
+    CERTIFICATE_CACHE_DIR = os.getenv('CERTIFICATE_CACHE_DIR')
+    CERTIFICATE_CACHE_MAX_MB = float(os.getenv('CERTIFICATE_CACHE_MAX_MB', '256'))
+
+    # Render certificates in background threads as soon as an attempt passes
+    # (see certificate_jobs.py); queued jobs beyond the limit are left to the download
+    CERTIFICATE_PRERENDER = os.getenv('CERTIFICATE_PRERENDER', 'true').lower() == 'true'
+    CERTIFICATE_RENDER_THREADS = int(os.getenv('CERTIFICATE_RENDER_THREADS', '1'))
+    CERTIFICATE_RENDER_QUEUE_SIZE = int(os.getenv('CERTIFICATE_RENDER_QUEUE_SIZE', '1000'))
+
+    # Render PDFs in worker processes (0: in the calling thread; see certificate_pool.py),
+    # how many renders may run or wait before downloads get a 503 (0: four per process),
+    # the Retry-After sent with it and how long a render may take (seconds).
+    # Every app worker (e.g. each gunicorn worker) starts its own pool, so a host
+    # runs app workers x CERTIFICATE_RENDER_PROCESSES renderers: keep it small
+    CERTIFICATE_RENDER_PROCESSES = int(os.getenv('CERTIFICATE_RENDER_PROCESSES', '1'))
+    CERTIFICATE_RENDER_MAX_PENDING = int(os.getenv('CERTIFICATE_RENDER_MAX_PENDING', '0'))
+    CERTIFICATE_RENDER_RETRY_AFTER = int(os.getenv('CERTIFICATE_RENDER_RETRY_AFTER', '2'))
+    CERTIFICATE_RENDER_TIMEOUT = float(os.getenv('CERTIFICATE_RENDER_TIMEOUT', '30'))
+
+    # Per-request SQL statement guard: 'off', 'warn' or 'enforce' (see query_guard.py),
+    # and how often one statement shape may repeat in a request before it is flagged
+    QUERY_GUARD = os.getenv('QUERY_GUARD', 'off')
+    QUERY_GUARD_REPEAT_THRESHOLD = int(os.getenv('QUERY_GUARD_REPEAT_THRESHOLD', '3'))
 
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    QUERY_GUARD = os.getenv('QUERY_GUARD', 'warn')
+
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.getenv('TEST_DATABASE_URL', 'sqlite://')
+    QUERY_GUARD = 'enforce'
+    # Offline: no translator or EmailJS calls, no background threads at startup,
+    # no render worker processes
+    TRANSLATION_PROVIDER = 'fake'
+    TRANSLATION_FAKE_SEED = int(os.getenv('TRANSLATION_FAKE_SEED', '1'))
+    TRANSLATION_BACKFILL_ON_STARTUP = False
+    EMAILJS_FAKE = True
+    CERTIFICATE_RENDER_PROCESSES = 0
 
 
 class ProductionConfig(Config):
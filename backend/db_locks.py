@@ -0,0 +1,56 @@
+"""
+Cross-process locks for maintenance work that must not run twice at once.
+
+Every app worker (and every script that builds the app) shares one database, so
+jobs such as the translation backfill and test form rebuilds take a named lock
+before touching shared rows. On PostgreSQL this is a session advisory lock held
+on a dedicated connection, so it covers all workers on all hosts. Other
+databases (SQLite in development and tests) fall back to a process-local lock.
+"""
+from contextlib import contextmanager
+import hashlib
+import threading
+
+from sqlalchemy import text
+
+from models import db
+
+_local_locks = {}
+_local_locks_guard = threading.Lock()
+
+
+def _lock_id(name: str) -> int:
+    # Advisory locks are keyed by a signed 64-bit integer
+    return int.from_bytes(hashlib.sha256(name.encode('utf-8')).digest()[:8], 'big', signed=True)
+
+
+@contextmanager
+def advisory_lock(name: str):
+    """Try to take the lock ``name`` without waiting; yields whether it was acquired.
+
+    Callers skip their work when the lock is held elsewhere. Must be used inside
+    an application context.
+    """
+    engine = db.engine
+    if engine.dialect.name != 'postgresql':
+        with _local_locks_guard:
+            lock = _local_locks.setdefault(name, threading.Lock())
+        acquired = lock.acquire(blocking=False)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                lock.release()
+        return
+
+    lock_id = _lock_id(name)
+    with engine.connect() as connection:
+        acquired = connection.execute(text('SELECT pg_try_advisory_lock(:id)'), {'id': lock_id}).scalar()
+        connection.commit()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                # Session-level lock: release it before the connection goes back to the pool
+                connection.execute(text('SELECT pg_advisory_unlock(:id)'), {'id': lock_id})
+                connection.commit()
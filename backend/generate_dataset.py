@@ -0,0 +1,287 @@
+"""
+Bulk generator for large synthetic datasets (scaling and benchmark runs)
+
+Writes candidates, their attempts, payments and attempt summaries straight to
+the tables: COPY on PostgreSQL and batched executemany elsewhere, never ORM
+adds. Output is fully determined by the seed, and every candidate shares one
+precomputed password hash (``dataset-password``).
+
+Candidates are spread over the roles in MCQ_DATA. Entry-level roles such as
+helpers and drivers get more candidates and pass more often than engineering
+and management roles. Candidates follow the real flow: pay, take up to three
+attempts, and sometimes pay the discounted fee to start over, which deletes the
+earlier attempts. With ``--attempts`` the per-candidate counts are then nudged
+until the total matches exactly; attempts beyond the third pass, as the
+physical verification rule says.
+
+Usage (from the backend directory, against DATABASE_URL):
+    python generate_dataset.py --users 1000000 --seed 7
+    python generate_dataset.py --users 100000 --attempts 1000000
+"""
+import argparse
+import csv
+from datetime import datetime, timedelta
+import io
+import random
+import time
+
+import bcrypt
+
+from models import db, Attempt, AttemptSummary, PaymentRecord, User
+from seed_questions import MCQ_DATA
+
+PASSWORD = 'dataset-password'
+BATCH_SIZE = 10000
+FULL_FEE = 800
+DISCOUNTED_FEE = 500
+
+# (keywords, share of candidates per role, pass rate per attempt)
+ROLE_TIERS = (
+    (('Engineer', 'Manager', 'Accountant', 'Officer', 'Draftsman'), 1.0, 0.55),
+    (('Operator', 'Technician', 'Electrician', 'Plumber', 'Carpenter', 'Mason', 'Fixer',
+      'Duct', 'Sprayer'), 2.5, 0.65),
+    (('Helper', 'Cleaner', 'Driver', 'Rider', 'Worker', 'Cashier'), 5.0, 0.75),
+)
+DEFAULT_TIER = (1.5, 0.65)
+
+
+def role_profiles(rng):
+    """Return ``[(role, weight, pass_rate)]`` for every role in MCQ_DATA."""
+    profiles = []
+    for role in MCQ_DATA:
+        weight, pass_rate = DEFAULT_TIER
+        for keywords, tier_weight, tier_pass_rate in ROLE_TIERS:
+            if any(keyword in role for keyword in keywords):
+                weight, pass_rate = tier_weight, tier_pass_rate
+                break
+        # Jitter so roles in the same tier are not identical
+        profiles.append((role, weight * rng.uniform(0.6, 1.4), min(max(pass_rate + rng.uniform(-0.1, 0.1), 0.05), 0.95)))
+    return profiles
+
+
+def simulate_attempts(rng, pass_rate):
+    """Return ``(attempt count kept in the database, passed, repayments)`` for one candidate."""
+    if rng.random() < 0.1:
+        return 0, False, 0  # signed up and paid but never took the test
+    repayments = 0
+    while True:
+        for number in range(1, 4):
+            if rng.random() < pass_rate:
+                return number, True, repayments
+        # Failed three times: pay the discounted fee and start over (attempts are
+        # deleted), or give up with the three failures on record
+        if rng.random() < 0.5 or repayments >= 3:
+            return 3, False, repayments
+        repayments += 1
+
+
+def fit_counts(counts, target, rng):
+    """Adjust ``counts`` in place so they sum to ``target``."""
+    difference = target - sum(counts)
+    if not counts:
+        return
+    while difference > 0:
+        step = max(difference // len(counts), 1)
+        for index in rng.sample(range(len(counts)), min(difference, len(counts))):
+            counts[index] += min(step, difference)
+            difference -= min(step, difference)
+            if not difference:
+                break
+    while difference < 0:
+        index = rng.randrange(len(counts))
+        if counts[index]:
+            counts[index] -= 1
+            difference += 1
+
+
+class _Writer:
+    """Buffers rows per table and writes them in bulk."""
+
+    def __init__(self, connection, use_copy):
+        self.connection = connection
+        self.use_copy = use_copy
+        self.buffers = {}
+        self.written = {}
+
+    def add(self, table, row):
+        buffer = self.buffers.setdefault(table.name, (table, []))[1]
+        buffer.append(row)
+        if len(buffer) >= BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        # Tables flush in the order they were first used (users before the rows
+        # referencing them), so foreign keys are satisfied batch by batch
+        for table, rows in self.buffers.values():
+            if not rows:
+                continue
+            if self.use_copy:
+                self._copy(table, rows)
+            else:
+                self.connection.execute(table.insert(), rows)
+            self.written[table.name] = self.written.get(table.name, 0) + len(rows)
+            rows.clear()
+
+    def _copy(self, table, rows):
+        columns = list(rows[0])
+        data = io.StringIO()
+        writer = csv.writer(data)
+        for row in rows:
+            writer.writerow([r'\N' if row[column] is None else row[column] for column in columns])
+        data.seek(0)
+        cursor = self.connection.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                data
+            )
+        finally:
+            cursor.close()
+
+
+def _next_id(model):
+    return (db.session.query(db.func.max(model.id)).scalar() or 0) + 1
+
+
+def generate_dataset(users, attempts=None, seed=1, days=365, verbose=False):
+    """Generate ``users`` candidates (and exactly ``attempts`` attempts if given).
+
+    Returns the number of rows written per table.
+    """
+    rng = random.Random(seed)
+    profiles = role_profiles(rng)
+    roles = [profile[0] for profile in profiles]
+    weights = [profile[1] for profile in profiles]
+    pass_rates = {profile[0]: profile[2] for profile in profiles}
+    # Cost 4 keeps the one hash cheap; the stored hash verifies like any other
+    password_hash = bcrypt.hashpw(PASSWORD.encode('utf-8'), bcrypt.gensalt(4)).decode('utf-8')
+    start = datetime(2025, 1, 1)
+
+    first_user_id = _next_id(User)
+    first_attempt_id = _next_id(Attempt)
+    first_payment_id = _next_id(PaymentRecord)
+
+    # Decide every candidate's role and history up front; a few ints each
+    candidate_roles = rng.choices(range(len(roles)), weights=weights, k=users)
+    histories = [simulate_attempts(rng, pass_rates[roles[role_index]]) for role_index in candidate_roles]
+    counts = [history[0] for history in histories]
+    if attempts is not None:
+        fit_counts(counts, attempts, rng)
+    if verbose:
+        print(f'  planned {users} users, {sum(counts)} attempts')
+
+    connection = db.session.connection()
+    writer = _Writer(connection, connection.dialect.name == 'postgresql')
+    attempt_id = first_attempt_id
+    payment_id = first_payment_id
+    started = time.perf_counter()
+
+    for index in range(users):
+        user_id = first_user_id + index
+        role = roles[candidate_roles[index]]
+        _, passed_last, repayments = histories[index]
+        count = counts[index]
+        created_at = start + timedelta(seconds=rng.randrange(days * 86400))
+
+        writer.add(User.__table__, {
+            'id': user_id,
+            'name': f'Candidate {user_id}',
+            'email': f'candidate{user_id}@dataset.local',
+            'password': password_hash,
+            'role': role,
+            'is_admin': False,
+            'created_at': created_at
+        })
+
+        moment = created_at + timedelta(minutes=rng.randint(1, 120))
+        writer.add(PaymentRecord.__table__, {
+            'id': payment_id,
+            'user_id': user_id,
+            'amount': FULL_FEE if rng.random() < 0.7 else DISCOUNTED_FEE,
+            'discounted': False,
+            'created_at': moment
+        })
+        payment_id += 1
+        for _ in range(repayments):
+            moment += timedelta(days=rng.randint(1, 14))
+            writer.add(PaymentRecord.__table__, {
+                'id': payment_id,
+                'user_id': user_id,
+                'amount': DISCOUNTED_FEE,
+                'discounted': True,
+                'created_at': moment
+            })
+            payment_id += 1
+
+        summary = {
+            'user_id': user_id,
+            'attempt_count': count,
+            'has_passed': False,
+            'passed_attempt_id': None,
+            'last_attempt_id': None,
+            'last_attempt_at': None,
+            'best_score': None,
+            'updated_at': moment
+        }
+        for number in range(1, count + 1):
+            moment += timedelta(minutes=rng.randint(20, 60 * 24 * 3))
+            if number == count and (passed_last or number > 3):
+                score = rng.randint(7, 10)
+            else:
+                score = rng.randint(0, 6)
+            passed = score >= 7 or number > 3
+            writer.add(Attempt.__table__, {
+                'id': attempt_id,
+                'user_id': user_id,
+                'score': score,
+                'attempt_number': number,
+                'passed': passed,
+                'timestamp': moment,
+                'form_id': None
+            })
+            if passed:
+                summary['has_passed'] = True
+                summary['passed_attempt_id'] = attempt_id
+            summary['last_attempt_id'] = attempt_id
+            summary['last_attempt_at'] = moment
+            summary['best_score'] = max(summary['best_score'] or 0, score)
+            summary['updated_at'] = moment
+            attempt_id += 1
+        writer.add(AttemptSummary.__table__, summary)
+
+        if verbose and (index + 1) % 100000 == 0:
+            print(f'  {index + 1}/{users} users ({time.perf_counter() - started:.0f}s)')
+
+    writer.flush()
+    if connection.dialect.name == 'postgresql':
+        # Explicit ids bypass the sequences; move them past the new rows
+        for table in ('users', 'attempts', 'payment_records'):
+            connection.exec_driver_sql(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"
+            )
+    db.session.commit()
+    return writer.written
+
+
+def main():
+    from app import create_app
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, required=True)
+    parser.add_argument('--attempts', type=int, help='exact number of attempts (default: as simulated)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--days', type=int, default=365, help='spread sign-ups over this many days')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        print(f'Generating {args.users} users (seed {args.seed})...')
+        started = time.perf_counter()
+        written = generate_dataset(args.users, args.attempts, seed=args.seed, days=args.days, verbose=True)
+        for table, count in written.items():
+            print(f'✓ {table}: {count} rows')
+        print(f'Finished in {time.perf_counter() - started:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
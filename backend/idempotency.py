@@ -0,0 +1,147 @@
+"""
+Idempotency-Key support for retry-prone POST endpoints.
+
+A client that sends ``Idempotency-Key: <unique value>`` can safely retry: the first
+request runs normally and its response is stored; a replay with the same key
+(and the same body) gets the stored response back without running the view
+again. Keys are scoped per user and endpoint and expire after
+``IDEMPOTENCY_TTL`` seconds; expired rows are swept periodically.
+
+Only final answers are stored. Responses that invite a retry (5xx, 409, 429,
+...) release the key, so the retry runs the view again. While the first request
+is running its key is held for ``IDEMPOTENCY_LEASE`` seconds only: if that worker
+dies, a retry after the lease takes the key over.
+"""
+from datetime import datetime, timedelta
+from functools import wraps
+import hashlib
+import threading
+import time
+
+from flask import current_app, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, IdempotencyRecord
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+# Below 500, but the client is expected to retry: not stored
+RETRYABLE_STATUSES = {408, 409, 425, 429}
+
+_purge_lock = threading.Lock()
+_last_purge = 0.0
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def purge_expired(now=None) -> int:
+    """Delete expired records. Returns the number of rows removed."""
+    now = now or datetime.utcnow()
+    result = db.session.execute(delete(IdempotencyRecord).where(IdempotencyRecord.expires_at <= now))
+    db.session.commit()
+    return result.rowcount
+
+
+def _maybe_purge(now):
+    global _last_purge
+    interval = current_app.config.get('IDEMPOTENCY_PURGE_INTERVAL', 300)
+    with _purge_lock:
+        if time.monotonic() - _last_purge < interval:
+            return
+        _last_purge = time.monotonic()
+    purge_expired(now)
+
+
+def _replay(record):
+    response = current_app.response_class(record.response_body or '', status=record.status_code,
+                                          mimetype='application/json')
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(scope):
+    """Make a JWT-protected view replay its stored response for repeated keys.
+
+    Apply below ``@jwt_required()``. Requests without the header are unaffected.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key:
+                return view(*args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return jsonify({'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'}), 400
+
+            user_id = int(get_jwt_identity())
+            key_hash = _sha256(key.encode('utf-8'))
+            request_hash = _sha256(request.get_data())
+            now = datetime.utcnow()
+            match = (
+                IdempotencyRecord.user_id == user_id,
+                IdempotencyRecord.scope == scope,
+                IdempotencyRecord.key_hash == key_hash
+            )
+
+            record = IdempotencyRecord.query.filter(*match, IdempotencyRecord.expires_at > now).first()
+            if record is not None:
+                if record.request_hash != request_hash:
+                    return jsonify({'error': f'{HEADER} was already used for a different request'}), 422
+                if record.status_code is None:
+                    return jsonify({'error': 'A request with this Idempotency-Key is still being processed'}), 409
+                return _replay(record)
+
+            # Reserve the key before running the view, so a concurrent retry waits
+            # for this one instead of doing the work twice. The reservation expires
+            # after the lease, when a retry may take the key over.
+            try:
+                db.session.execute(delete(IdempotencyRecord).where(*match, IdempotencyRecord.expires_at <= now))
+                record = IdempotencyRecord(
+                    user_id=user_id,
+                    scope=scope,
+                    key_hash=key_hash,
+                    request_hash=request_hash,
+                    created_at=now,
+                    expires_at=now + timedelta(seconds=current_app.config.get('IDEMPOTENCY_LEASE', 60))
+                )
+                db.session.add(record)
+                db.session.flush()
+                # Read the id before commit expires the object (saves a reload)
+                record_id = record.id
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                return jsonify({'error': 'A request with this Idempotency-Key is still being processed'}), 409
+
+            try:
+                response = make_response(view(*args, **kwargs))
+            except Exception:
+                db.session.rollback()
+                db.session.execute(delete(IdempotencyRecord).where(IdempotencyRecord.id == record_id))
+                db.session.commit()
+                raise
+
+            if response.status_code >= 500 or response.status_code in RETRYABLE_STATUSES:
+                # Let the client retry failures for real
+                db.session.execute(delete(IdempotencyRecord).where(IdempotencyRecord.id == record_id))
+            else:
+                # No-op if the lease ran out and a retry took the key over meanwhile
+                db.session.execute(
+                    update(IdempotencyRecord)
+                    .where(IdempotencyRecord.id == record_id)
+                    .values(
+                        status_code=response.status_code,
+                        response_body=response.get_data(as_text=True),
+                        expires_at=datetime.utcnow() + timedelta(seconds=current_app.config.get('IDEMPOTENCY_TTL', 86400))
+                    )
+                )
+            db.session.commit()
+
+            _maybe_purge(now)
+            return response
+        return wrapper
+    return decorator
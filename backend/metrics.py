@@ -0,0 +1,259 @@
+"""
+Request, SQL and rendering metrics in Prometheus text format.
+
+``init_app`` times every request and counts the SQL statements it runs (through
+SQLAlchemy cursor events), labelled by blueprint and route rule. Other modules
+record their own timings with ``observe`` or the ``timed`` context manager
+(translator calls, certificate rendering). ``GET /metrics`` renders everything,
+plus the numbers of every registered collector (cache and job statistics) as
+gauges; ``GET /api/metrics`` returns the same collectors as JSON.
+
+Everything lives in process memory, so with several workers each one reports
+its own numbers; Prometheus sums them per instance.
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+import math
+import threading
+import time
+
+from flask import Response, g, has_request_context, jsonify, request
+from sqlalchemy import event
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name, help_text, labels, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, value, label_values):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        for label_values, (counts, total, count) in sorted(self._series.items()):
+            labels = _format_labels(self.labels, label_values)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == math.inf else _format_value(bound)
+                lines.append(f'{self.name}_bucket{_format_labels(self.labels + ("le",), label_values + (le,))} {cumulative}')
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._series = {}
+
+    def inc(self, label_values, amount=1):
+        self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        for label_values, value in sorted(self._series.items()):
+            lines.append(f'{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}')
+        return lines
+
+
+_lock = threading.Lock()
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time spent handling requests.', ('method', 'blueprint', 'route'))
+REQUESTS = Counter(
+    'http_requests_total', 'Requests handled, by response status.', ('method', 'blueprint', 'route', 'status'))
+REQUEST_STATEMENTS = Histogram(
+    'http_request_sql_statements', 'SQL statements executed per request.', ('method', 'blueprint', 'route'),
+    buckets=STATEMENT_BUCKETS)
+REQUEST_SQL_TIME = Histogram(
+    'http_request_sql_seconds', 'Time spent in SQL per request.', ('method', 'blueprint', 'route'))
+STATEMENTS = Counter(
+    'db_statements_total', 'SQL statements executed, including outside requests.', ('context',))
+STATEMENT_TIME = Counter(
+    'db_statement_seconds_total', 'Time spent executing SQL statements.', ('context',))
+
+# Timings recorded by other modules through observe()/timed(), created on first use
+_histograms = {}
+
+# prefix -> callable returning a (possibly nested) dict of numbers
+_collectors = {}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, float):
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        return repr(value)
+    return str(value)
+
+
+def observe(name, seconds, help_text='', buckets=LATENCY_BUCKETS, **labels):
+    """Record ``seconds`` in the histogram ``name`` (created on first use)."""
+    label_names = tuple(sorted(labels))
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram(name, help_text or name, label_names, buckets)
+        histogram.observe(seconds, tuple(labels[key] for key in histogram.labels))
+
+
+@contextmanager
+def timed(name, help_text='', **labels):
+    """Time the ``with`` block into the histogram ``name``."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, help_text, **labels)
+
+
+def register_collector(prefix, collect):
+    """Expose the numbers in ``collect()`` (a possibly nested dict) on both endpoints."""
+    _collectors[prefix] = collect
+
+
+def collect():
+    """Return ``{prefix: collect()}`` for every registered collector."""
+    return {prefix: collect() for prefix, collect in list(_collectors.items())}
+
+
+def _gauges(prefix, values):
+    lines = []
+    for key, value in values.items():
+        name = f'{prefix}_{key}'
+        if isinstance(value, dict):
+            lines.extend(_gauges(name, value))
+        elif isinstance(value, (int, float)):
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {_format_value(value)}')
+        elif isinstance(value, str) and value.isidentifier():
+            # Enum-like text such as the breaker state becomes an info-style gauge;
+            # free text (timestamps, error messages) would explode label cardinality
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name}{{value="{_escape(value)}"}} 1')
+    return lines
+
+
+def render():
+    """Return all metrics in the Prometheus text exposition format."""
+    with _lock:
+        lines = []
+        for metric in (REQUEST_LATENCY, REQUESTS, REQUEST_STATEMENTS, REQUEST_SQL_TIME, STATEMENTS, STATEMENT_TIME):
+            lines.extend(metric.render())
+        for name in sorted(_histograms):
+            lines.extend(_histograms[name].render())
+    for prefix, values in collect().items():
+        lines.extend(_gauges(prefix, values))
+    return '\n'.join(lines) + '\n'
+
+
+def _route_labels():
+    rule = request.url_rule
+    return (
+        request.method,
+        request.blueprint or '',
+        rule.rule if rule is not None else 'unmatched'
+    )
+
+
+def _before_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_statements = 0
+    g.metrics_sql_time = 0.0
+
+
+def _after_request(response):
+    g.metrics_status = response.status_code
+    return response
+
+
+def _teardown_request(exception):
+    # Recorded at teardown, which also runs when an exception escaped the view
+    # or an after_request hook and no response was finalized
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    status = 500 if exception is not None else g.pop('metrics_status', 500)
+    labels = _route_labels()
+    with _lock:
+        REQUEST_LATENCY.observe(elapsed, labels)
+        REQUESTS.inc(labels + (str(status),))
+        REQUEST_STATEMENTS.observe(g.pop('metrics_statements', 0), labels)
+        REQUEST_SQL_TIME.observe(g.pop('metrics_sql_time', 0.0), labels)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_started')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    in_request = has_request_context() and 'metrics_statements' in g
+    if in_request:
+        g.metrics_statements += 1
+        g.metrics_sql_time += elapsed
+    context_label = 'request' if in_request else 'background'
+    with _lock:
+        STATEMENTS.inc((context_label,))
+        STATEMENT_TIME.inc((context_label,), elapsed)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('metrics_started'):
+        connection.info['metrics_started'].pop()
+
+
+def init_app(app, engine):
+    """Install the request hooks, SQL listeners and the two metrics routes."""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'handle_error', _handle_error)
+
+    @app.route('/metrics')
+    def prometheus_metrics():
+        return Response(render(), mimetype=None, content_type=CONTENT_TYPE)
+
+    @app.route('/api/metrics')
+    def json_metrics():
+        return jsonify(collect()), 200
@@ -37,6 +37,10 @@ class User(db.Model):
 
 class Question(db.Model):
     __tablename__ = 'questions'
+    __table_args__ = (
+        # Covers the per-role id scan used for random sampling
+        db.Index('ix_questions_role_id', 'role', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     role = db.Column(db.String(50), nullable=False)
@@ -54,38 +58,50 @@ class Question(db.Model):
     option_d_ur = db.Column(db.String(255))
     
     def to_dict(self, include_answer=False, language='en'):
-        language = (language or 'en').lower()
+        return serialize_question(self, include_answer=include_answer, language=language)
 
-        def localized(primary, translated):
-            if language == 'ur' and translated:
-                return translated
-            return primary
 
-        data = {
-            'id': self.id,
-            'role': self.role,
-            'question_text': localized(self.question_text, self.question_text_ur),
-            'question_text_en': self.question_text,
-            'question_text_ur': self.question_text_ur,
-            'option_a': localized(self.option_a, self.option_a_ur),
-            'option_a_en': self.option_a,
-            'option_a_ur': self.option_a_ur,
-            'option_b': localized(self.option_b, self.option_b_ur),
-            'option_b_en': self.option_b,
-            'option_b_ur': self.option_b_ur,
-            'option_c': localized(self.option_c, self.option_c_ur),
-            'option_c_en': self.option_c,
-            'option_c_ur': self.option_c_ur,
-            'option_d': localized(self.option_d, self.option_d_ur),
-            'option_d_en': self.option_d,
-            'option_d_ur': self.option_d_ur
-        }
-        if include_answer:
-            data['correct_option'] = self.correct_option
-        return data
+def serialize_question(question, include_answer=False, language='en'):
+    """Build the API payload for a question.
+
+    Accepts a ``Question`` row or any object exposing the same attributes, such as
+    the cached records in ``question_cache``.
+    """
+    language = (language or 'en').lower()
+
+    def localized(primary, translated):
+        if language == 'ur' and translated:
+            return translated
+        return primary
+
+    data = {
+        'id': question.id,
+        'role': question.role,
+        'question_text': localized(question.question_text, question.question_text_ur),
+        'question_text_en': question.question_text,
+        'question_text_ur': question.question_text_ur,
+        'option_a': localized(question.option_a, question.option_a_ur),
+        'option_a_en': question.option_a,
+        'option_a_ur': question.option_a_ur,
+        'option_b': localized(question.option_b, question.option_b_ur),
+        'option_b_en': question.option_b,
+        'option_b_ur': question.option_b_ur,
+        'option_c': localized(question.option_c, question.option_c_ur),
+        'option_c_en': question.option_c,
+        'option_c_ur': question.option_c_ur,
+        'option_d': localized(question.option_d, question.option_d_ur),
+        'option_d_en': question.option_d,
+        'option_d_ur': question.option_d_ur
+    }
+    if include_answer:
+        data['correct_option'] = question.correct_option
+    return data
 
 class Attempt(db.Model):
     __tablename__ = 'attempts'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'attempt_number', name='uq_attempts_user_attempt_number'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -93,6 +109,8 @@ class Attempt(db.Model):
     attempt_number = db.Column(db.Integer, nullable=False)
     passed = db.Column(db.Boolean, default=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    # Precomputed test form the questions came from, if any (see question_forms.py)
+    form_id = db.Column(db.Integer, index=True)
     
     def to_dict(self):
         return {
@@ -101,10 +119,68 @@ class Attempt(db.Model):
             'score': self.score,
             'attempt_number': self.attempt_number,
             'passed': self.passed,
-            'timestamp': self.timestamp.isoformat()
+            'timestamp': self.timestamp.isoformat(),
+            'form_id': self.form_id
         }
 
 
+# Serves per-user attempt history newest-first, including keyset pagination on
+# (timestamp, id)
+db.Index('ix_attempts_user_timestamp', Attempt.user_id, Attempt.timestamp.desc(), Attempt.id.desc())
+
+
+class AttemptSummary(db.Model):
+    """Per-user attempt totals, kept in step with every attempt insert."""
+    __tablename__ = 'attempt_summaries'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    attempt_count = db.Column(db.Integer, nullable=False, default=0)
+    has_passed = db.Column(db.Boolean, nullable=False, default=False)
+    passed_attempt_id = db.Column(db.Integer)  # most recent passed attempt
+    last_attempt_id = db.Column(db.Integer)
+    last_attempt_at = db.Column(db.DateTime)
+    best_score = db.Column(db.Integer)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    user = db.relationship(
+        'User',
+        backref=db.backref('attempt_summary', uselist=False, lazy=True, cascade='all, delete-orphan')
+    )
+
+    def to_dict(self):
+        return {
+            'attempt_count': self.attempt_count or 0,
+            'has_passed': bool(self.has_passed),
+            'passed_attempt_id': self.passed_attempt_id,
+            'last_attempt_id': self.last_attempt_id,
+            'last_attempt_at': self.last_attempt_at.isoformat() if self.last_attempt_at else None,
+            'best_score': self.best_score
+        }
+
+
+class TestForm(db.Model):
+    """A pre-generated set of question ids served as one test.
+
+    Forms are never edited or deleted, so attempts can always resolve their
+    form_id; a rebuild retires the role's current forms and adds new ones.
+    """
+    __tablename__ = 'test_forms'
+    __table_args__ = (
+        db.Index('ix_test_forms_role_retired_position', 'role', 'retired', 'position'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    role = db.Column(db.String(50), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    question_ids = db.Column(db.String(255), nullable=False)  # comma-separated
+    bank_signature = db.Column(db.String(64), nullable=False)
+    retired = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def get_question_ids(self):
+        return [int(question_id) for question_id in self.question_ids.split(',')]
+
+
 class PaymentRecord(db.Model):
     __tablename__ = 'payment_records'
 
@@ -124,3 +200,36 @@ class PaymentRecord(db.Model):
             'discounted': self.discounted,
             'created_at': self.created_at.isoformat()
         }
+
+
+class TranslationMemory(db.Model):
+    """Translations shared by every worker, keyed by a hash of the source text."""
+    __tablename__ = 'translation_memory'
+    __table_args__ = (
+        db.UniqueConstraint('source_hash', 'target_language', name='uq_translation_memory_source_target'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    source_hash = db.Column(db.String(64), nullable=False)
+    target_language = db.Column(db.String(10), nullable=False)
+    source_text = db.Column(db.Text, nullable=False)
+    translated_text = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class IdempotencyRecord(db.Model):
+    """Stored response for a request sent with an Idempotency-Key header."""
+    __tablename__ = 'idempotency_records'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'scope', 'key_hash', name='uq_idempotency_user_scope_key'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    scope = db.Column(db.String(50), nullable=False)
+    key_hash = db.Column(db.String(64), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer)  # None while the original request is in flight
+    response_body = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
@@ -0,0 +1,104 @@
+"""
+Per-request SQL statement guard for development and tests.
+
+Counts the statements each request runs and flags two problems:
+
+* the same statement shape (SQL with parameters and IN lists collapsed) running
+  ``QUERY_GUARD_REPEAT_THRESHOLD`` or more times, the usual sign of an N+1 loop;
+* more statements than the route's declared ``@query_budget(n)``.
+
+``QUERY_GUARD`` selects the mode: ``off``, ``warn`` (log, and report the count
+in an ``X-Query-Count`` header) or ``enforce`` (raise ``QueryBudgetExceeded``,
+which fails the request and, with ``TESTING`` on, the test that made it).
+"""
+from collections import Counter
+from functools import wraps
+import logging
+import re
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+MODES = ('off', 'warn', 'enforce')
+
+_WHITESPACE = re.compile(r'\s+')
+_IN_LIST = re.compile(r'\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*\)')
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A request ran more statements than its budget, or repeated one too often."""
+
+
+def query_budget(max_statements):
+    """Declare how many SQL statements the decorated view may run per request.
+
+    Place it directly under ``@blueprint.route`` so it wraps the other decorators.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            return view(*args, **kwargs)
+        wrapper.query_budget = max_statements
+        return wrapper
+    return decorator
+
+
+def statement_shape(statement):
+    """Normalize SQL so executions that differ only in parameters compare equal."""
+    shape = _WHITESPACE.sub(' ', statement).strip()
+    shape = _IN_LIST.sub('(?)', shape)
+    return _LITERAL.sub('?', shape)
+
+
+def _before_request():
+    g.query_guard_statements = []
+
+
+def _on_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        statements = g.get('query_guard_statements')
+        if statements is not None:
+            statements.append(statement)
+
+
+def _after_request(response):
+    statements = g.pop('query_guard_statements', None)
+    if statements is None:
+        return response
+    response.headers['X-Query-Count'] = str(len(statements))
+
+    problems = []
+    view = current_app.view_functions.get(request.endpoint)
+    budget = getattr(view, 'query_budget', None)
+    if budget is not None and len(statements) > budget:
+        problems.append(f'{len(statements)} statements, budget is {budget}')
+
+    threshold = current_app.config.get('QUERY_GUARD_REPEAT_THRESHOLD', 3)
+    for shape, count in Counter(statement_shape(statement) for statement in statements).most_common():
+        if count < threshold:
+            break
+        problems.append(f'{count}x {shape[:200]}')
+
+    if problems:
+        message = f'{request.method} {request.path}: ' + '; '.join(problems)
+        if current_app.config.get('QUERY_GUARD') == 'enforce':
+            raise QueryBudgetExceeded(message)
+        logger.warning('Query guard: %s', message)
+    return response
+
+
+def init_app(app, engine):
+    """Install the guard if ``QUERY_GUARD`` is ``warn`` or ``enforce``."""
+    mode = (app.config.get('QUERY_GUARD') or 'off').lower()
+    if mode not in MODES:
+        raise ValueError(f'Unknown QUERY_GUARD mode: {mode}')
+    app.config['QUERY_GUARD'] = mode
+    if mode == 'off':
+        return
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    if not event.contains(engine, 'before_cursor_execute', _on_statement):
+        event.listen(engine, 'before_cursor_execute', _on_statement)
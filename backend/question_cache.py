@@ -0,0 +1,247 @@
+"""Process-level cache of question pools, keyed by role.
+
+Each role's pool is held as a tuple of read-only ``QuestionRecord`` rows so the
+request path never has to hydrate ORM objects. Pools are invalidated whenever a
+``Question`` row is inserted, updated or deleted through the ORM (seeding, admin
+edits, translation backfill) and, as a safety net for changes made by other
+processes, after ``QUESTION_CACHE_TTL`` seconds.
+
+The candidate-facing JSON of each question is also kept pre-encoded per language
+so a questions response can be stitched together from bytes.
+"""
+
+import json
+import random
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import db, Question, serialize_question
+
+
+class QuestionRecord(NamedTuple):
+    id: int
+    role: str
+    question_text: str
+    option_a: str
+    option_b: str
+    option_c: str
+    option_d: str
+    correct_option: str
+    question_text_ur: Optional[str]
+    option_a_ur: Optional[str]
+    option_b_ur: Optional[str]
+    option_c_ur: Optional[str]
+    option_d_ur: Optional[str]
+
+
+_COLUMNS = [getattr(Question, field) for field in QuestionRecord._fields]
+
+_lock = threading.Lock()
+_pools: Dict[str, Tuple[float, Tuple[QuestionRecord, ...]]] = {}
+# Bumped by invalidate() (per role, and for all roles at once), so a load that
+# overlapped an invalidation does not cache what it read before the change
+_generations: Dict[str, int] = {}
+_global_generation = 0
+_fragments: Dict[Tuple[int, str], Tuple[QuestionRecord, bytes]] = {}
+_ttl = 300.0
+_stats = {
+    'hits': 0,
+    'misses': 0,
+    'reloads': 0,
+    'invalidations': 0,
+    'last_reload_ms': 0.0,
+    'total_reload_ms': 0.0,
+    'fragment_hits': 0,
+    'fragment_misses': 0,
+}
+
+
+def configure(config) -> None:
+    """Apply cache settings from the Flask config."""
+    global _ttl
+    _ttl = float(config.get('QUESTION_CACHE_TTL', _ttl))
+
+
+def _load_pool(role: str) -> Tuple[QuestionRecord, ...]:
+    rows = db.session.query(*_COLUMNS).filter(Question.role == role).order_by(Question.id).all()
+    return tuple(QuestionRecord(*row) for row in rows)
+
+
+def get_pool(role: str) -> Tuple[QuestionRecord, ...]:
+    """Return every question for ``role``, loading it from the database on a miss."""
+    now = time.monotonic()
+    with _lock:
+        entry = _pools.get(role)
+        if entry is not None and now - entry[0] < _ttl:
+            _stats['hits'] += 1
+            return entry[1]
+        _stats['misses'] += 1
+        generation = (_global_generation, _generations.get(role, 0))
+
+    started = time.perf_counter()
+    pool = _load_pool(role)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    with _lock:
+        if generation == (_global_generation, _generations.get(role, 0)):
+            _pools[role] = (time.monotonic(), pool)
+        # Otherwise the role was invalidated while loading: the rows may predate
+        # the change, so serve them to this caller only and reload next time
+        _stats['reloads'] += 1
+        _stats['last_reload_ms'] = elapsed_ms
+        _stats['total_reload_ms'] += elapsed_ms
+    return pool
+
+
+def sample_from_database(role: str, k: int, retries: int = 3) -> Optional[List[QuestionRecord]]:
+    """Pick ``k`` distinct random questions for ``role`` without loading the pool.
+
+    Only the role's ids are read (an index-only scan on ``ix_questions_role_id``),
+    sampled uniformly with ``random.sample`` and then fetched with a single ``IN``
+    query, which behaves the same on PostgreSQL and SQLite. Returns ``None`` when the
+    role has fewer than ``k`` questions.
+    """
+    for _ in range(retries):
+        ids = [row[0] for row in db.session.query(Question.id).filter(Question.role == role)]
+        if len(ids) < k:
+            return None
+
+        chosen = random.sample(ids, k)
+        rows = db.session.query(*_COLUMNS).filter(Question.id.in_(chosen)).all()
+        by_id = {row.id: QuestionRecord(*row) for row in rows}
+        # A question deleted between the two queries leaves a gap; draw again.
+        if len(by_id) == k:
+            return [by_id[question_id] for question_id in chosen]
+    return None
+
+
+def to_record(question) -> QuestionRecord:
+    """Snapshot a ``Question`` row (or anything with the same attributes)."""
+    return QuestionRecord(*(getattr(question, field) for field in QuestionRecord._fields))
+
+
+def encode_question(record: QuestionRecord, language: str) -> bytes:
+    """Return the candidate-facing JSON for ``record`` (no answer) as UTF-8 bytes.
+
+    Fragments are cached per (question id, language). An entry is only reused while
+    it was built from an identical record, so a reloaded pool with edited text can
+    never be served a stale fragment.
+    """
+    language = 'ur' if language == 'ur' else 'en'
+    key = (record.id, language)
+    with _lock:
+        entry = _fragments.get(key)
+        if entry is not None and entry[0] == record:
+            _stats['fragment_hits'] += 1
+            return entry[1]
+        _stats['fragment_misses'] += 1
+
+    payload = serialize_question(record, include_answer=False, language=language)
+    encoded = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    with _lock:
+        _fragments[key] = (record, encoded)
+    return encoded
+
+
+def encode_questions(records, language: str) -> bytes:
+    """Stitch the cached fragments of ``records`` into a JSON array."""
+    return b'[' + b','.join(encode_question(record, language) for record in records) + b']'
+
+
+def discard_fragments(*question_ids: int) -> None:
+    """Forget the encoded fragments of the given questions in every language."""
+    ids = set(question_ids)
+    with _lock:
+        for key in [key for key in _fragments if key[0] in ids]:
+            del _fragments[key]
+
+
+def invalidate(role: Optional[str] = None) -> None:
+    """Drop the cached pool for ``role``, or every pool when no role is given."""
+    global _global_generation
+    with _lock:
+        if role is None:
+            _pools.clear()
+            _global_generation += 1
+        else:
+            _pools.pop(role, None)
+            _generations[role] = _generations.get(role, 0) + 1
+        _stats['invalidations'] += 1
+
+
+def stats() -> dict:
+    """Return hit/miss counters and reload timings for the metrics endpoint."""
+    with _lock:
+        lookups = _stats['hits'] + _stats['misses']
+        return {
+            **_stats,
+            'hit_ratio': (_stats['hits'] / lookups) if lookups else 0.0,
+            'cached_roles': len(_pools),
+            'cached_questions': sum(len(pool) for _, pool in _pools.values()),
+            'cached_fragments': len(_fragments),
+        }
+
+
+# Roles and ids touched by a session are collected on flush and only invalidated
+# once the transaction commits, so a concurrent reader cannot re-cache
+# uncommitted data. A reader that was already loading when the commit landed
+# does not cache its result either (see the generations in get_pool).
+_PENDING_KEY = 'question_cache_pending'
+
+
+def _pending(target):
+    session = Session.object_session(target)
+    if session is None:
+        return None
+    return session.info.setdefault(_PENDING_KEY, {'roles': set(), 'ids': set()})
+
+
+def _mark_dirty(mapper, connection, target):
+    pending = _pending(target)
+    if pending is None:
+        invalidate()
+        discard_fragments(target.id)
+        return
+    pending['roles'].add(target.role)
+    pending['ids'].add(target.id)
+
+
+def _mark_updated(mapper, connection, target):
+    _mark_dirty(mapper, connection, target)
+    pending = _pending(target)
+    if pending is None:
+        return
+    history = db.inspect(target).attrs.role.history
+    if history.deleted:
+        pending['roles'].update(history.deleted)
+    elif history.added:
+        # The previous role was expired before being reassigned, so we cannot
+        # tell which pool lost the question; drop them all.
+        pending['roles'].add(None)
+
+
+event.listen(Question, 'after_insert', _mark_dirty)
+event.listen(Question, 'after_delete', _mark_dirty)
+event.listen(Question, 'after_update', _mark_updated)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    discard_fragments(*pending['ids'])
+    if None in pending['roles']:
+        invalidate()
+        return
+    for role in pending['roles']:
+        invalidate(role)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,223 @@
+"""
+Precomputed randomized test forms.
+
+Instead of sampling 10 questions on every ``GET /api/test/questions/<role>``, a
+ring of 10-question forms is generated per role ahead of time. Every question
+appears in the ring about equally often, no form repeats a question, and each
+form has a stable id that attempts record for later analytics. The request path
+just takes the next form from the ring.
+
+Each form stores a signature of the question ids it was built from. When the
+bank for a role changes, its forms stop matching: the request path falls back to
+plain random sampling and rebuilds the ring in the background. A rebuild retires
+the old forms rather than deleting them, so attempts keep a valid form_id, and
+it runs under a per-role ``db_locks`` lock so that app workers starting or
+noticing the change at the same time do not rebuild the same ring twice.
+Rebuild all rings from the command line with:
+
+    python question_forms.py
+"""
+import hashlib
+import itertools
+import logging
+import random
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from models import db, Question, TestForm
+import db_locks
+import question_cache
+
+FORM_SIZE = 10
+# How long a process serves random samples before looking for forms built elsewhere
+EMPTY_RING_RETRY_SECONDS = 30
+
+_lock = threading.Lock()
+_rings: Dict[str, '_Ring'] = {}
+_rebuilding = set()
+
+
+class _Ring(NamedTuple):
+    pool: tuple
+    records: dict
+    forms: Tuple[Tuple[int, Tuple[int, ...]], ...]
+    cursor: itertools.count
+    loaded_at: float
+
+
+def bank_signature(question_ids: Sequence[int]) -> str:
+    """Fingerprint of a role's question ids; forms are valid only for a matching bank."""
+    joined = ','.join(str(question_id) for question_id in sorted(question_ids))
+    return hashlib.sha256(joined.encode('utf-8')).hexdigest()
+
+
+def generate_forms(question_ids: Sequence[int], form_count: int, form_size: int = FORM_SIZE,
+                   rng: Optional[random.Random] = None) -> List[List[int]]:
+    """Lay out ``form_count`` forms so each question is used about equally.
+
+    Questions are dealt from successive shuffled passes over the whole bank, so
+    usage counts differ by at most one. Ids left over at the end of a pass are
+    completed with ids from the next pass that are not already in the form.
+    """
+    if len(question_ids) < form_size:
+        raise ValueError(f'Need at least {form_size} questions to build forms')
+
+    rng = rng or random.Random()
+    forms = []
+    queue = []
+    while len(forms) < form_count:
+        if len(queue) < form_size:
+            carried = set(queue)
+            next_pass = list(question_ids)
+            rng.shuffle(next_pass)
+            # Pull ids that are not already in the carried-over partial form to the front
+            fresh = [question_id for question_id in next_pass if question_id not in carried]
+            repeats = [question_id for question_id in next_pass if question_id in carried]
+            needed = form_size - len(queue)
+            queue.extend(fresh[:needed] + repeats + fresh[needed:])
+        forms.append(queue[:form_size])
+        queue = queue[form_size:]
+    return forms
+
+
+def rebuild_forms(role: str, form_count: int = 200, seed=None, only_stale: bool = False) -> Optional[int]:
+    """Retire the current forms for ``role`` and store a new ring.
+
+    Returns the number of forms written, or None if the rebuild was skipped
+    because another process is rebuilding ``role`` (or, with ``only_stale``,
+    because its forms already match the bank).
+    """
+    with db_locks.advisory_lock(f'test-forms:{role}') as acquired:
+        if not acquired:
+            return None
+        if only_stale and not _is_stale(role):
+            # Another process got there first: reload its forms on the next request
+            with _lock:
+                _rings.pop(role, None)
+            return None
+        return _write_forms(role, form_count, seed)
+
+
+def _write_forms(role, form_count, seed):
+    question_ids = [row[0] for row in db.session.query(Question.id).filter(Question.role == role)]
+    TestForm.query.filter_by(role=role, retired=False).update({'retired': True}, synchronize_session=False)
+
+    written = 0
+    if len(question_ids) >= FORM_SIZE:
+        signature = bank_signature(question_ids)
+        forms = generate_forms(question_ids, form_count, rng=random.Random(seed))
+        db.session.add_all([
+            TestForm(
+                role=role,
+                position=position,
+                question_ids=','.join(str(question_id) for question_id in form),
+                bank_signature=signature
+            )
+            for position, form in enumerate(forms)
+        ])
+        written = len(forms)
+
+    db.session.commit()
+    with _lock:
+        _rings.pop(role, None)
+    return written
+
+
+def rebuild_all_forms(form_count: int = 200, only_stale: bool = False) -> Dict[str, int]:
+    """Rebuild the rings of every role (or only those whose bank changed)."""
+    roles = [row[0] for row in db.session.query(Question.role).distinct()]
+    rebuilt = {}
+    for role in roles:
+        written = rebuild_forms(role, form_count, only_stale=only_stale)
+        if written is not None:
+            rebuilt[role] = written
+    return rebuilt
+
+
+def _is_stale(role: str) -> bool:
+    question_ids = [row[0] for row in db.session.query(Question.id).filter(Question.role == role)]
+    signatures = {
+        row[0] for row in
+        db.session.query(TestForm.bank_signature).filter(TestForm.role == role, TestForm.retired.is_(False)).distinct()
+    }
+    return signatures != {bank_signature(question_ids)}
+
+
+def _load_ring(role: str, pool: tuple) -> _Ring:
+    signature = bank_signature([record.id for record in pool])
+    rows = (
+        db.session.query(TestForm.id, TestForm.question_ids, TestForm.bank_signature)
+        .filter(TestForm.role == role, TestForm.retired.is_(False))
+        .order_by(TestForm.position)
+        .all()
+    )
+    forms = ()
+    if rows and all(row.bank_signature == signature for row in rows):
+        forms = tuple(
+            (row.id, tuple(int(question_id) for question_id in row.question_ids.split(',')))
+            for row in rows
+        )
+    # Start each process at a random point so workers do not serve forms in lockstep
+    start = random.randrange(len(forms)) if forms else 0
+    return _Ring(pool, {record.id: record for record in pool}, forms, itertools.count(start), time.monotonic())
+
+
+def _schedule_rebuild(app, role: str, form_count: int) -> None:
+    with _lock:
+        if role in _rebuilding:
+            return
+        _rebuilding.add(role)
+
+    def worker():
+        with app.app_context():
+            try:
+                # Skipped while another process is rebuilding the ring; its forms
+                # are picked up when the empty ring is next reloaded
+                rebuild_forms(role, form_count, only_stale=True)
+            except Exception:
+                db.session.rollback()
+                logging.exception('Rebuilding test forms for %s failed', role)
+            finally:
+                with _lock:
+                    _rebuilding.discard(role)
+
+    threading.Thread(target=worker, name=f'form-rebuild-{role}', daemon=True).start()
+
+
+def next_form(role: str, app=None, form_count: int = 200):
+    """Return ``(form_id, records)`` for the next form in ``role``'s ring.
+
+    Returns None when the role has no up-to-date forms; if ``app`` is given a
+    background rebuild is started so later requests get forms again.
+    """
+    pool = question_cache.get_pool(role)
+    with _lock:
+        ring = _rings.get(role)
+    if (ring is None or ring.pool is not pool
+            or (not ring.forms and time.monotonic() - ring.loaded_at > EMPTY_RING_RETRY_SECONDS)):
+        ring = _load_ring(role, pool)
+        with _lock:
+            _rings[role] = ring
+
+    if not ring.forms:
+        if app is not None and len(pool) >= FORM_SIZE:
+            _schedule_rebuild(app, role, form_count)
+        return None
+
+    form_id, question_ids = ring.forms[next(ring.cursor) % len(ring.forms)]
+    return form_id, [ring.records[question_id] for question_id in question_ids]
+
+
+def main():
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        print('Rebuilding test forms...')
+        for role, count in rebuild_all_forms(app.config.get('TEST_FORMS_PER_ROLE', 200)).items():
+            print(f'✓ {role}: {count} forms')
+
+
+if __name__ == '__main__':
+    main()
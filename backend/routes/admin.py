@@ -1,8 +1,10 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import func
+from sqlalchemy import case, func
 from sqlalchemy.exc import IntegrityError
 from models import User, Attempt, PaymentRecord, db
+from query_guard import query_budget
+import translation_backfill
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -15,6 +17,7 @@ def _require_admin(user_id):
 
 
 @admin_bp.route('/analytics', methods=['GET'])
+@query_budget(12)
 @jwt_required()
 def get_analytics():
     """Return platform analytics for admin dashboard."""
@@ -43,17 +46,21 @@ def get_analytics():
     passes_by_category = {role: count for role, count in passes_by_category_query.all()}
 
     recent_payments_query = (
-        PaymentRecord.query.order_by(PaymentRecord.created_at.desc()).limit(5).all()
+        db.session.query(PaymentRecord, User.name)
+        .outerjoin(User, User.id == PaymentRecord.user_id)
+        .order_by(PaymentRecord.created_at.desc())
+        .limit(5)
+        .all()
     )
     recent_payments = [
         {
             'id': payment.id,
-            'user': payment.user.name if payment.user else 'Unknown',
+            'user': user_name or 'Unknown',
             'amount': payment.amount,
             'discounted': payment.discounted,
             'created_at': payment.created_at.isoformat()
         }
-        for payment in recent_payments_query
+        for payment, user_name in recent_payments_query
     ]
 
     return jsonify({
@@ -75,6 +82,7 @@ def get_analytics():
 
 
 @admin_bp.route('/users', methods=['GET'])
+@query_budget(3)
 @jwt_required()
 def list_users():
     """Return detailed information about all users."""
@@ -83,22 +91,44 @@ def list_users():
     if error_response:
         return error_response, status_code
 
-    users = User.query.order_by(User.created_at.desc()).all()
+    # Aggregate attempts and payments per user in the database instead of
+    # loading every user's attempts and payments lazily
+    attempt_stats = (
+        db.session.query(
+            Attempt.user_id.label('user_id'),
+            func.count(Attempt.id).label('total'),
+            func.coalesce(func.sum(case((Attempt.passed.is_(True), 1), else_=0)), 0).label('passed'),
+            func.max(Attempt.timestamp).label('last_at')
+        )
+        .group_by(Attempt.user_id)
+        .subquery()
+    )
+    payment_stats = (
+        db.session.query(
+            PaymentRecord.user_id.label('user_id'),
+            func.count(PaymentRecord.id).label('count'),
+            func.coalesce(func.sum(PaymentRecord.amount), 0).label('amount'),
+            func.max(PaymentRecord.created_at).label('last_at')
+        )
+        .group_by(PaymentRecord.user_id)
+        .subquery()
+    )
+    rows = (
+        db.session.query(
+            User,
+            attempt_stats.c.total, attempt_stats.c.passed, attempt_stats.c.last_at,
+            payment_stats.c.count, payment_stats.c.amount, payment_stats.c.last_at
+        )
+        .outerjoin(attempt_stats, attempt_stats.c.user_id == User.id)
+        .outerjoin(payment_stats, payment_stats.c.user_id == User.id)
+        .order_by(User.created_at.desc())
+        .all()
+    )
 
     data = []
-    for user in users:
-        attempts = user.attempts or []
-        payments = user.payments or []
-
-        attempts_total = len(attempts)
-        attempts_passed = sum(1 for attempt in attempts if attempt.passed)
-        attempts_failed = attempts_total - attempts_passed
-
-        last_attempt = max((attempt.timestamp for attempt in attempts), default=None)
-        last_payment = max((payment.created_at for payment in payments), default=None)
-
-        payments_total_amount = sum(payment.amount for payment in payments)
-        payments_count = len(payments)
+    for user, attempts_total, attempts_passed, last_attempt, payments_count, payments_total_amount, last_payment in rows:
+        attempts_total = attempts_total or 0
+        attempts_passed = attempts_passed or 0
 
         data.append({
             'id': user.id,
@@ -109,10 +139,10 @@ def list_users():
             'created_at': user.created_at.isoformat() if user.created_at else None,
             'attempts_total': attempts_total,
             'attempts_passed': attempts_passed,
-            'attempts_failed': attempts_failed,
+            'attempts_failed': attempts_total - attempts_passed,
             'last_attempt_at': last_attempt.isoformat() if last_attempt else None,
-            'payments_total_amount': payments_total_amount,
-            'payments_count': payments_count,
+            'payments_total_amount': payments_total_amount or 0,
+            'payments_count': payments_count or 0,
             'last_payment_at': last_payment.isoformat() if last_payment else None
         })
 
@@ -198,3 +228,30 @@ def delete_user(target_user_id):
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/translations/backfill', methods=['GET'])
+@jwt_required()
+def get_translation_backfill():
+    """Report progress of the Urdu translation backfill."""
+    user_id = int(get_jwt_identity())
+    _, error_response, status_code = _require_admin(user_id)
+    if error_response:
+        return error_response, status_code
+
+    return jsonify(translation_backfill.progress()), 200
+
+
+@admin_bp.route('/translations/backfill', methods=['POST'])
+@jwt_required()
+def start_translation_backfill():
+    """Start a background Urdu translation backfill."""
+    user_id = int(get_jwt_identity())
+    _, error_response, status_code = _require_admin(user_id)
+    if error_response:
+        return error_response, status_code
+
+    if not translation_backfill.start_backfill(current_app._get_current_object()):
+        return jsonify({'error': 'A translation backfill is already running'}), 409
+
+    return jsonify({'message': 'Translation backfill started'}), 202
@@ -1,150 +1,204 @@
-from flask import Blueprint, jsonify, send_file
+from flask import Blueprint, current_app, jsonify, request, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, User, Attempt
+from reportlab import rl_config
 from reportlab.lib.pagesizes import letter, A4, landscape
 from reportlab.lib.units import inch
 from reportlab.pdfgen import canvas
 from reportlab.lib import colors
-from reportlab.lib.utils import ImageReader
+from PIL import Image
 from datetime import datetime
+import hashlib
 import io
+import logging
 import os
+import tempfile
+import threading
+import time
+import certificate_cache
+import certificate_pool
+import metrics
+from query_guard import query_budget
 
 certificate_bp = Blueprint('certificate', __name__)
 
-def generate_certificate_pdf(user_name, role, score, date):
-    """Generate a PDF certificate mirroring the frontend design."""
-    buffer = io.BytesIO()
-    page_size = landscape(A4)
-    c = canvas.Canvas(buffer, pagesize=page_size)
-    width, height = page_size
+# Bump whenever the PDF layout or assets change, so cached certificates and
+# their ETags are replaced
+TEMPLATE_VERSION = 4
+
+# Write image and page streams as binary rather than ASCII85 text: ASCII85 is
+# encoded in pure Python on every render and adds a quarter to their size. This
+# is a process-wide ReportLab setting; certificates are its only user here.
+rl_config.useA85 = 0
+
+PAGE_SIZE = landscape(A4)
+WATERMARK_OPACITY = 0.12
+WATERMARK_PATH = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', '..', 'frontend', 'public', 'logo-website.png'
+))
+
+# Color palette
+PRIMARY = colors.HexColor('#009edb')
+PRIMARY_DARK = colors.HexColor('#0075a4')
+PRIMARY_LIGHT = colors.HexColor('#e0f7ff')
+BADGE_GOLD = colors.HexColor('#f5c242')
+SLATE_800 = colors.HexColor('#1f2933')
+SCORE_BG = colors.HexColor('#bbf7d0')  # Tailwind green-100 equivalent
+SCORE_TEXT = colors.HexColor('#047857')
+
+# Layout
+CARD_MARGIN = 45
+CORNER_RADIUS = 18
+HEADER_Y = PAGE_SIZE[1] - CARD_MARGIN - 60
+BODY_TOP = HEADER_Y - 120
+SCORE_BOX_WIDTH = 220
+SCORE_BOX_HEIGHT = 50
+SCORE_BOX_Y = BODY_TOP - 210
+
+# The watermark is printed WATERMARK_WIDTH points wide; the logo is downscaled
+# to WATERMARK_DPI at that size, which is plenty for a mark at 12% opacity
+WATERMARK_WIDTH = (PAGE_SIZE[0] - CARD_MARGIN * 2) * 0.65
+WATERMARK_DPI = 72
+WATERMARK_JPEG_QUALITY = 75
 
-    # Color palette
-    primary = colors.HexColor('#009edb')
-    primary_dark = colors.HexColor('#0075a4')
-    primary_light = colors.HexColor('#e0f7ff')
-    badge_gold = colors.HexColor('#f5c242')
-    slate_800 = colors.HexColor('#1f2933')
+# The watermark is encoded once per process into a JPEG file:
+# ((width, height), path), or False if the logo is unusable. drawImage embeds a
+# JPEG file as is, without decoding or recompressing it, so each render only
+# reads a few kilobytes.
+_watermark_lock = threading.Lock()
+_watermark = None
+
+
+def _encode_watermark():
+    """Downscale the logo to its printed resolution and flatten it onto white.
+
+    The opacity is baked into the pixels (the logo is blended with the white
+    card it is drawn on), so the result is an opaque JPEG with no soft mask and
+    the page needs no transparency.
+    """
+    try:
+        with Image.open(WATERMARK_PATH) as logo:
+            logo = logo.convert('RGBA')
+    except (OSError, ValueError) as exc:
+        logging.warning('Certificate watermark unavailable: %s', exc)
+        return False
+
+    target_width = round(WATERMARK_WIDTH / inch * WATERMARK_DPI)
+    if logo.width > target_width:
+        target_height = max(round(logo.height * target_width / logo.width), 1)
+        logo = logo.resize((target_width, target_height), Image.LANCZOS)
+
+    alpha = logo.getchannel('A').point(lambda value: round(value * WATERMARK_OPACITY))
+    rgb = Image.new('RGB', logo.size, 'white')
+    rgb.paste(logo.convert('RGB'), mask=alpha)
+    jpeg = io.BytesIO()
+    rgb.save(jpeg, 'JPEG', quality=WATERMARK_JPEG_QUALITY, optimize=True)
+    data = jpeg.getvalue()
+
+    # Named by content, so processes sharing the directory share the file
+    path = os.path.join(
+        tempfile.gettempdir(),
+        f'certificate-watermark-{hashlib.sha256(data).hexdigest()[:16]}.jpg'
+    )
+    if not os.path.exists(path):
+        try:
+            handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(handle, 'wb') as temp_file:
+                temp_file.write(data)
+            os.replace(temp_path, path)
+        except OSError as exc:
+            logging.warning('Certificate watermark unavailable: %s', exc)
+            return False
+    return logo.size, path
+
+
+def _load_watermark():
+    global _watermark
+    if _watermark is None:
+        with _watermark_lock:
+            if _watermark is None:
+                _watermark = _encode_watermark()
+    return _watermark or None
+
+
+def _draw_static_layer(c):
+    """Draw everything that is the same on every certificate."""
+    width, height = PAGE_SIZE
 
     # Background (white to match frontend page)
     c.setFillColor(colors.white)
     c.rect(0, 0, width, height, fill=1, stroke=0)
 
     # Card container
-    card_margin = 45
-    corner_radius = 18
-    card_width = width - (card_margin * 2)
-    card_height = height - (card_margin * 2)
+    card_width = width - (CARD_MARGIN * 2)
+    card_height = height - (CARD_MARGIN * 2)
 
     c.setFillColor(colors.white)
-    c.roundRect(card_margin, card_margin, card_width, card_height, corner_radius, fill=1, stroke=0)
+    c.roundRect(CARD_MARGIN, CARD_MARGIN, card_width, card_height, CORNER_RADIUS, fill=1, stroke=0)
+
+    # Watermark logo: opaque, so it goes under everything else on the card
+    watermark = _load_watermark()
+    if watermark:
+        (logo_width_px, logo_height_px), path = watermark
+        desired_width = WATERMARK_WIDTH
+        aspect_ratio = logo_height_px / logo_width_px if logo_width_px else 1
+        desired_height = desired_width * aspect_ratio
+        c.drawImage(path, (width - desired_width) / 2, (height - desired_height) / 2,
+                    width=desired_width, height=desired_height)
 
     # Outer border
-    c.setStrokeColor(primary)
+    c.setStrokeColor(PRIMARY)
     c.setLineWidth(4)
-    c.roundRect(card_margin, card_margin, card_width, card_height, corner_radius, fill=0, stroke=1)
+    c.roundRect(CARD_MARGIN, CARD_MARGIN, card_width, card_height, CORNER_RADIUS, fill=0, stroke=1)
 
     # Subtle inner border
-    c.setStrokeColor(primary_light)
+    c.setStrokeColor(PRIMARY_LIGHT)
     c.setLineWidth(2)
-    inner_margin = card_margin + 12
-    c.roundRect(inner_margin, inner_margin, width - (inner_margin * 2), height - (inner_margin * 2), corner_radius, fill=0, stroke=1)
-
-    # Watermark logo
-    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
-    logo_path = os.path.join(project_root, 'frontend', 'public', 'logo-website.png')
-    if os.path.exists(logo_path):
-        try:
-            logo = ImageReader(logo_path)
-            logo_width_px, logo_height_px = logo.getSize()
-            desired_width = card_width * 0.65
-            aspect_ratio = logo_height_px / logo_width_px if logo_width_px else 1
-            desired_height = desired_width * aspect_ratio
-            logo_x = (width - desired_width) / 2
-            logo_y = (height - desired_height) / 2
-
-            c.saveState()
-            if hasattr(c, 'setFillAlpha'):
-                c.setFillAlpha(0.12)
-            c.drawImage(
-                logo,
-                logo_x,
-                logo_y,
-                width=desired_width,
-                height=desired_height,
-                mask='auto',
-                preserveAspectRatio=True
-            )
-            c.restoreState()
-        except Exception:
-            pass
+    inner_margin = CARD_MARGIN + 12
+    c.roundRect(inner_margin, inner_margin, width - (inner_margin * 2), height - (inner_margin * 2), CORNER_RADIUS, fill=0, stroke=1)
 
     # Header text
-    header_y = height - card_margin - 60
-    c.setFillColor(primary)
+    c.setFillColor(PRIMARY)
     c.setFont("Helvetica-Bold", 48)
-    c.drawCentredString(width / 2, header_y, "CERTIFICATE")
+    c.drawCentredString(width / 2, HEADER_Y, "CERTIFICATE")
 
     c.setFont("Helvetica-Bold", 22)
-    c.setFillColor(slate_800)
-    c.drawCentredString(width / 2, header_y - 42, "OF ACHIEVEMENT")
+    c.setFillColor(SLATE_800)
+    c.drawCentredString(width / 2, HEADER_Y - 42, "OF ACHIEVEMENT")
 
     # Divider line
-    c.setStrokeColor(primary)
+    c.setStrokeColor(PRIMARY)
     c.setLineWidth(2)
-    c.line(width / 2 - 110, header_y - 65, width / 2 + 110, header_y - 65)
+    c.line(width / 2 - 110, HEADER_Y - 65, width / 2 + 110, HEADER_Y - 65)
 
     # Body copy
-    body_top = header_y - 120
-    c.setFillColor(slate_800)
+    c.setFillColor(SLATE_800)
     c.setFont("Helvetica", 16)
-    c.drawCentredString(width / 2, body_top, "This is to certify that")
-
-    c.setFont("Helvetica-Bold", 30)
-    c.setFillColor(primary_dark)
-    c.drawCentredString(width / 2, body_top - 45, user_name.upper())
+    c.drawCentredString(width / 2, BODY_TOP, "This is to certify that")
 
     # Underline accent
-    c.setStrokeColor(primary)
+    c.setStrokeColor(PRIMARY)
     c.setLineWidth(1.5)
     underline_width = 240
-    c.line((width - underline_width) / 2, body_top - 55, (width + underline_width) / 2, body_top - 55)
+    c.line((width - underline_width) / 2, BODY_TOP - 55, (width + underline_width) / 2, BODY_TOP - 55)
 
-    c.setFillColor(slate_800)
+    c.setFillColor(SLATE_800)
     c.setFont("Helvetica", 16)
-    c.drawCentredString(width / 2, body_top - 95, "has successfully completed the")
-
-    c.setFillColor(primary)
-    c.setFont("Helvetica-Bold", 26)
-    c.drawCentredString(width / 2, body_top - 135, f"{role} Certification Test")
+    c.drawCentredString(width / 2, BODY_TOP - 95, "has successfully completed the")
 
     # Score card
-    score_box_width = 220
-    score_box_height = 50
-    score_box_x = (width - score_box_width) / 2
-    score_box_y = body_top - 210
-    score_bg = colors.HexColor('#bbf7d0')  # Tailwind green-100 equivalent
-    score_text = colors.HexColor('#047857')
-    c.setFillColor(score_bg)
-    c.roundRect(score_box_x, score_box_y, score_box_width, score_box_height, 14, fill=1, stroke=0)
-    c.setStrokeColor(score_bg)
+    score_box_x = (width - SCORE_BOX_WIDTH) / 2
+    c.setFillColor(SCORE_BG)
+    c.roundRect(score_box_x, SCORE_BOX_Y, SCORE_BOX_WIDTH, SCORE_BOX_HEIGHT, 14, fill=1, stroke=0)
+    c.setStrokeColor(SCORE_BG)
     c.setLineWidth(1)
-    c.roundRect(score_box_x, score_box_y, score_box_width, score_box_height, 14, fill=0, stroke=1)
-
-    c.setFont("Helvetica-Bold", 18)
-    c.setFillColor(score_text)
-    c.drawCentredString(width / 2, score_box_y + (score_box_height / 2) - 5, f"Score: {score}/10")
-
-    # Date label
-    c.setFont("Helvetica", 14)
-    c.setFillColor(slate_800)
-    c.drawCentredString(width / 2, score_box_y - 45, f"Date: {date}")
+    c.roundRect(score_box_x, SCORE_BOX_Y, SCORE_BOX_WIDTH, SCORE_BOX_HEIGHT, 14, fill=0, stroke=1)
 
     # Badge
     badge_radius = 40
-    badge_center_x = width - card_margin - badge_radius - 15
-    badge_center_y = height - card_margin - badge_radius - 15
-    c.setFillColor(badge_gold)
+    badge_center_x = width - CARD_MARGIN - badge_radius - 15
+    badge_center_y = height - CARD_MARGIN - badge_radius - 15
+    c.setFillColor(BADGE_GOLD)
     c.circle(badge_center_x, badge_center_y, badge_radius, stroke=0, fill=1)
     c.setFillColor(colors.white)
     c.setFont("Helvetica-Bold", 20)
@@ -155,15 +209,59 @@ def generate_certificate_pdf(user_name, role, score, date):
     # Footer note
     c.setFont("Helvetica-Oblique", 10)
     c.setFillColor(colors.HexColor('#6b7280'))
-    c.drawCentredString(width / 2, card_margin + 30, "This certificate is generated digitally and does not require a physical signature.")
+    c.drawCentredString(width / 2, CARD_MARGIN + 30, "This certificate is generated digitally and does not require a physical signature.")
+
+
+def certificate_date(attempt):
+    """The date printed on the certificate for a passing attempt."""
+    return attempt.timestamp.strftime('%B %d, %Y')
+
+
+def generate_certificate_pdf(user_name, role, score, date):
+    """Generate a PDF certificate mirroring the frontend design.
+
+    The static design is drawn again for every certificate: ReportLab binds a
+    form XObject to the document it was drawn in and cannot share one between
+    documents. What is expensive to redo, the watermark image, is prepared once
+    per process (see _load_watermark), and whole PDFs are cached by
+    certificate_cache.
+    """
+    started = time.perf_counter()
+    buffer = io.BytesIO()
+    # invariant: fixed creation date and document id, so the same inputs always
+    # give the same bytes (required for the cache's strong ETags)
+    c = canvas.Canvas(buffer, pagesize=PAGE_SIZE, invariant=1)
+    width, height = PAGE_SIZE
+
+    _draw_static_layer(c)
+
+    c.setFont("Helvetica-Bold", 30)
+    c.setFillColor(PRIMARY_DARK)
+    c.drawCentredString(width / 2, BODY_TOP - 45, user_name.upper())
+
+    c.setFillColor(PRIMARY)
+    c.setFont("Helvetica-Bold", 26)
+    c.drawCentredString(width / 2, BODY_TOP - 135, f"{role} Certification Test")
+
+    c.setFont("Helvetica-Bold", 18)
+    c.setFillColor(SCORE_TEXT)
+    c.drawCentredString(width / 2, SCORE_BOX_Y + (SCORE_BOX_HEIGHT / 2) - 5, f"Score: {score}/10")
+
+    # Date label
+    c.setFont("Helvetica", 14)
+    c.setFillColor(SLATE_800)
+    c.drawCentredString(width / 2, SCORE_BOX_Y - 45, f"Date: {date}")
 
     c.showPage()
     c.save()
 
     buffer.seek(0)
+    metrics.observe('certificate_render_seconds', time.perf_counter() - started,
+                    'Time spent rendering certificate PDFs.')
     return buffer
 
 @certificate_bp.route('/certificate/<int:user_id>', methods=['GET'])
+@query_budget(3)
 @jwt_required()
 def get_certificate(user_id):
     """Get certificate data for a user"""
@@ -197,7 +295,7 @@ def get_certificate(user_id):
             'name': user.name,
             'role': user.role,
             'score': passed_attempt.score,
-            'date': passed_attempt.timestamp.strftime('%B %d, %Y'),
+            'date': certificate_date(passed_attempt),
             'attempt_number': passed_attempt.attempt_number
         }), 200
         
@@ -205,6 +303,7 @@ def get_certificate(user_id):
         return jsonify({'error': str(e)}), 500
 
 @certificate_bp.route('/certificate/<int:user_id>/download', methods=['GET'])
+@query_budget(3)
 @jwt_required()
 def download_certificate(user_id):
     """Download certificate as PDF"""
@@ -229,21 +328,50 @@ def download_certificate(user_id):
         if not passed_attempt:
             return jsonify({'error': 'No passed attempt found'}), 404
         
-        # Generate PDF
-        pdf_buffer = generate_certificate_pdf(
-            user.name,
-            user.role,
-            passed_attempt.score,
-            passed_attempt.timestamp.strftime('%B %d, %Y')
-        )
-        
-        # Return PDF file
-        return send_file(
-            pdf_buffer,
-            as_attachment=True,
-            download_name=f'certificate_{user.name.replace(" ", "_")}.pdf',
-            mimetype='application/pdf'
-        )
+        name, role, score = user.name, user.role, passed_attempt.score
+        date = certificate_date(passed_attempt)
+        key = certificate_cache.cache_key(TEMPLATE_VERSION, name, role, score, date)
+        download_name = f'certificate_{name.replace(" ", "_")}.pdf'
+
+        # The key covers every input of the PDF, so a matching ETag means the
+        # client already has these exact bytes
+        if request.if_none_match.contains(key):
+            response = current_app.response_class(status=304)
+            response.set_etag(key)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+
+        try:
+            path, data = certificate_cache.get_or_render(
+                key,
+                lambda: certificate_pool.render(name, role, score, date)
+            )
+            try:
+                response = send_file(
+                    path if path is not None else io.BytesIO(data),
+                    as_attachment=True,
+                    download_name=download_name,
+                    mimetype='application/pdf',
+                    etag=key,
+                    conditional=True
+                )
+            except FileNotFoundError:
+                # Evicted between lookup and open; serve a fresh render instead
+                response = send_file(
+                    io.BytesIO(certificate_pool.render(name, role, score, date)),
+                    as_attachment=True,
+                    download_name=download_name,
+                    mimetype='application/pdf',
+                    etag=key
+                )
+        except certificate_pool.RenderPoolSaturated:
+            response = jsonify({'error': 'Certificate rendering is busy, please try again shortly'})
+            response.status_code = 503
+            response.headers['Retry-After'] = str(current_app.config.get('CERTIFICATE_RENDER_RETRY_AFTER', 2))
+            return response
+        # Cacheable by the browser only, and revalidated (cheaply, via ETag) each time
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -11,6 +11,10 @@ def _normalize(value: str | None) -> str:
 
 
 def _send_via_emailjs(config, payload: dict) -> None:
+    if config.get('EMAILJS_FAKE'):
+        current_app.logger.info('EmailJS disabled, not sending message from %s', payload.get('email'))
+        return
+
     service_id = config.get('EMAILJS_SERVICE_ID')
     template_id = config.get('EMAILJS_TEMPLATE_ID')
     public_key = config.get('EMAILJS_PUBLIC_KEY')
@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import User, PaymentRecord, db
+from idempotency import idempotent
+from query_guard import query_budget
 
 payment_bp = Blueprint('payment', __name__)
 
@@ -24,7 +26,9 @@ def authorize_payment():
 
 
 @payment_bp.route('/record', methods=['POST'])
+@query_budget(8)
 @jwt_required()
+@idempotent('payment-record')
 def record_payment():
     """Record a payment made by the authenticated user."""
     data = request.get_json() or {}
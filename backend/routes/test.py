@@ -1,71 +1,123 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Question, Attempt, User
+from models import db, Question, Attempt, AttemptSummary, TestForm, User
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
+import base64
+import json
 import random
+import time
 
-from translation_utils import translate_text
+import attempt_summary
+import certificate_jobs
+from idempotency import idempotent
+from query_guard import query_budget
+from routes.certificate import certificate_date
+import question_cache
+import question_forms
 
 test_bp = Blueprint('test', __name__)
 
-@test_bp.route('/questions/<role>', methods=['GET'])
+ATTEMPT_ALLOCATION_RETRIES = 5
+STATUS_ATTEMPTS_LIMIT = 10
+ATTEMPTS_PAGE_SIZE = 20
+ATTEMPTS_PAGE_MAX = 100
+
+@test_bp.route('/questions/<path:role>', methods=['GET'])
+@query_budget(4)
 @jwt_required()
 def get_questions(role):
     """Fetch 10 random questions for the specified role"""
     try:
         language = request.args.get('lang', 'en').lower()
 
-        # Get all questions for this role
-        all_questions = Question.query.filter_by(role=role).all()
+        sampling = current_app.config.get('QUESTION_SAMPLING')
+        form = None
+        if sampling == 'forms':
+            # Take the next precomputed form from the role's ring
+            form = question_forms.next_form(
+                role,
+                app=current_app._get_current_object(),
+                form_count=current_app.config.get('TEST_FORMS_PER_ROLE', 200)
+            )
+
+        if form is not None:
+            form_id, selected_questions = form
+        elif sampling == 'database':
+            # Pull exactly 10 random rows out of the database
+            form_id = None
+            selected_questions = question_cache.sample_from_database(role, 10)
+        else:
+            form_id = None
+            # Select 10 random questions from the process-level pool cache
+            all_questions = question_cache.get_pool(role)
+            selected_questions = random.sample(all_questions, 10) if len(all_questions) >= 10 else None
         
-        if len(all_questions) < 10:
+        if selected_questions is None:
             return jsonify({
                 'error': f'Not enough questions available for {role}. Need at least 10.'
             }), 400
-        
-        # Select 10 random questions
-        selected_questions = random.sample(all_questions, 10)
-
-        translations_made = False
-
-        if language == 'ur':
-            fields = [
-                ('question_text', 'question_text_ur'),
-                ('option_a', 'option_a_ur'),
-                ('option_b', 'option_b_ur'),
-                ('option_c', 'option_c_ur'),
-                ('option_d', 'option_d_ur')
-            ]
-
-            for question in selected_questions:
-                for source_attr, target_attr in fields:
-                    source_value = getattr(question, source_attr)
-                    target_value = getattr(question, target_attr)
 
-                    if source_value and not target_value:
-                        translated = translate_text(source_value, dest='ur')
-                        if translated:
-                            setattr(question, target_attr, translated)
-                            translations_made = True
-
-            if translations_made:
-                db.session.commit()
-
-        # Return questions without correct answers
-        questions_data = [
-            q.to_dict(include_answer=False, language=language)
-            for q in selected_questions
-        ]
+        # Return questions without correct answers, stitched from pre-encoded fragments.
+        # Urdu text comes from the background translation backfill; questions it has
+        # not reached yet are served in English rather than blocking on the network.
+        body = b''.join([
+            b'{"form_id":',
+            json.dumps(form_id).encode('utf-8'),
+            b',"language":',
+            json.dumps(language).encode('utf-8'),
+            b',"questions":',
+            question_cache.encode_questions(selected_questions, language),
+            b'}'
+        ])
         
-        return jsonify({
-            'questions': questions_data,
-            'language': language
-        }), 200
+        return current_app.response_class(body, status=200, mimetype='application/json')
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def score_answers(answers):
+    """Count correct answers in ``{question_id: selected_option}``.
+
+    Every answer key is fetched in a single IN query and compared in bulk.
+    """
+    submitted = {int(question_id): selected_option for question_id, selected_option in answers.items()}
+    if not submitted:
+        return 0
+    answer_keys = dict(
+        db.session.query(Question.id, Question.correct_option)
+        .filter(Question.id.in_(submitted))
+        .all()
+    )
+    return sum(
+        1 for question_id, selected_option in submitted.items()
+        if answer_keys.get(question_id) == selected_option
+    )
+
+def _is_role_form(form_id, role):
+    """Whether ``form_id`` is a stored test form (current or retired) for ``role``."""
+    return db.session.query(TestForm.id).filter_by(id=form_id, role=role).first() is not None
+
+def _evaluate_attempt(score, attempt_number):
+    """Return (passed, message) for a score on the given attempt."""
+    if attempt_number <= 2:
+        # First two attempts: normal evaluation
+        if score >= 7:
+            return True, f'Congratulations! You passed with {score}/10'
+        return False, f'You scored {score}/10. You need at least 7 to pass. You have {3 - attempt_number} attempt(s) remaining.'
+    if attempt_number == 3:
+        # Third attempt
+        if score >= 7:
+            return True, f'Congratulations! You passed with {score}/10'
+        return False, f'You scored {score}/10. Physical assistance required for final verification.'
+    # After 3rd attempt with physical assistance
+    return True, f'You have passed after physical verification with score {score}/10'
+
 @test_bp.route('/submit-test', methods=['POST'])
+@query_budget(15)
 @jwt_required()
+@idempotent('submit-test')
 def submit_test():
     """Evaluate test submission and save attempt"""
     try:
@@ -77,57 +129,61 @@ def submit_test():
             return jsonify({'error': 'Answers are required'}), 400
         
         answers = data['answers']  # Format: {question_id: selected_option}
+        form_id = data.get('form_id')  # Precomputed form the questions came from, if any
+        if form_id is not None:
+            try:
+                form_id = int(form_id)
+            except (TypeError, ValueError):
+                return jsonify({'error': 'form_id must be an integer'}), 400
         
         # Get user
         user = User.query.get(user_id)
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Count previous attempts
-        previous_attempts = Attempt.query.filter_by(user_id=user_id).count()
-        attempt_number = previous_attempts + 1
+        if form_id is not None and not _is_role_form(form_id, user.role):
+            # Unknown id or another role's form: record the attempt without one
+            form_id = None
         
         # Calculate score
-        score = 0
         total_questions = len(answers)
         
-        for question_id, selected_option in answers.items():
-            question = Question.query.get(int(question_id))
-            if question and question.correct_option == selected_option:
-                score += 1
-        
-        # Determine pass/fail
-        passed = False
-        message = ''
-        
-        if attempt_number <= 2:
-            # First two attempts: normal evaluation
-            if score >= 7:
-                passed = True
-                message = f'Congratulations! You passed with {score}/10'
-            else:
-                message = f'You scored {score}/10. You need at least 7 to pass. You have {3 - attempt_number} attempt(s) remaining.'
-        elif attempt_number == 3:
-            # Third attempt
-            if score >= 7:
-                passed = True
-                message = f'Congratulations! You passed with {score}/10'
-            else:
-                message = f'You scored {score}/10. Physical assistance required for final verification.'
+        score = score_answers(answers)
+        
+        # Allocate the attempt number under a lock on the summary row. The unique
+        # (user_id, attempt_number) constraint catches anything that slips past it
+        # (e.g. two first-ever submissions racing to create the row); retry then.
+        for retry in range(ATTEMPT_ALLOCATION_RETRIES):
+            try:
+                summary = attempt_summary.get_summary(user_id, create=True, for_update=True)
+                attempt_number = summary.attempt_count + 1
+                passed, message = _evaluate_attempt(score, attempt_number)
+                
+                # Save attempt
+                attempt = Attempt(
+                    user_id=user_id,
+                    score=score,
+                    attempt_number=attempt_number,
+                    passed=passed,
+                    form_id=form_id
+                )
+                db.session.add(attempt)
+                db.session.flush()
+                attempt_summary.record_attempt(summary, attempt)
+                # Read before the commit expires the instances
+                certificate = (user.name, user.role, score, certificate_date(attempt)) if passed else None
+                db.session.commit()
+                break
+            except IntegrityError:
+                db.session.rollback()
+                # Jittered backoff so colliding submitters do not collide again
+                time.sleep(random.uniform(0, 0.01) * (retry + 1))
         else:
-            # After 3rd attempt with physical assistance
-            passed = True
-            message = f'You have passed after physical verification with score {score}/10'
-        
-        # Save attempt
-        attempt = Attempt(
-            user_id=user_id,
-            score=score,
-            attempt_number=attempt_number,
-            passed=passed
-        )
-        db.session.add(attempt)
-        db.session.commit()
+            return jsonify({'error': 'Could not record attempt, please try again'}), 409
+
+        if certificate:
+            # Render the certificate now, off the request path, so the download is a file serve
+            certificate_jobs.enqueue(*certificate)
         
         return jsonify({
             'score': score,
@@ -142,35 +198,75 @@ def submit_test():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def encode_attempts_cursor(attempt):
+    """Opaque cursor pointing just past ``attempt`` in newest-first order."""
+    raw = f'{attempt.timestamp.isoformat()}|{attempt.id}'
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_attempts_cursor(cursor):
+    """Return (timestamp, id) from a cursor; raises ValueError if it is malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, attempt_id = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(timestamp), int(attempt_id)
+    except Exception as exc:
+        raise ValueError('Invalid cursor') from exc
+
+
+def _attempts_page(user_id, limit, cursor=None):
+    """Return (attempts, next_cursor) for one page of the user's history, newest first.
+
+    Keyset pagination on (timestamp, id), served by ix_attempts_user_timestamp.
+    """
+    query = Attempt.query.filter(Attempt.user_id == user_id)
+    if cursor:
+        timestamp, attempt_id = decode_attempts_cursor(cursor)
+        query = query.filter(tuple_(Attempt.timestamp, Attempt.id) < tuple_(timestamp, attempt_id))
+
+    attempts = query.order_by(Attempt.timestamp.desc(), Attempt.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_attempts_cursor(attempts[limit - 1]) if len(attempts) > limit else None
+    return attempts[:limit], next_cursor
+
 @test_bp.route('/attempts', methods=['GET'])
+@query_budget(2)
 @jwt_required()
 def get_attempts():
-    """Get all attempts for current user"""
+    """Get a page of attempts for current user (?limit=&cursor=)"""
     try:
         user_id = int(get_jwt_identity())
-        
-        attempts = Attempt.query.filter_by(user_id=user_id).order_by(Attempt.timestamp.desc()).all()
+
+        try:
+            limit = min(max(int(request.args.get('limit', ATTEMPTS_PAGE_SIZE)), 1), ATTEMPTS_PAGE_MAX)
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+
+        try:
+            attempts, next_cursor = _attempts_page(user_id, limit, request.args.get('cursor'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
-            'attempts': [attempt.to_dict() for attempt in attempts]
+            'attempts': [attempt.to_dict() for attempt in attempts],
+            'next_cursor': next_cursor
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @test_bp.route('/attempt-count', methods=['GET'])
+@query_budget(2)
 @jwt_required()
 def get_attempt_count():
     """Get attempt count for current user"""
     try:
         user_id = int(get_jwt_identity())
         
-        count = Attempt.query.filter_by(user_id=user_id).count()
-        passed_attempt = Attempt.query.filter_by(user_id=user_id, passed=True).first()
+        summary = attempt_summary.get_summary(user_id)
         
         return jsonify({
-            'attempt_count': count,
-            'has_passed': passed_attempt is not None
+            'attempt_count': summary.attempt_count,
+            'has_passed': summary.has_passed
         }), 200
         
     except Exception as e:
@@ -183,16 +279,20 @@ def reset_attempts():
     try:
         user_id = int(get_jwt_identity())
 
-        total_attempts = Attempt.query.filter_by(user_id=user_id).count()
-        passed_attempt = Attempt.query.filter_by(user_id=user_id, passed=True).first()
+        # Same row lock as submit_test, so no attempt can be recorded between the
+        # checks below and the delete
+        summary = attempt_summary.get_summary(user_id, create=True, for_update=True)
 
-        if passed_attempt:
+        if summary.has_passed:
+            db.session.rollback()
             return jsonify({'error': 'Cannot reset attempts after passing the test'}), 400
 
-        if total_attempts < 3:
+        if summary.attempt_count < 3:
+            db.session.rollback()
             return jsonify({'error': 'Repayment not required yet'}), 400
 
         Attempt.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+        attempt_summary.reset(summary)
         db.session.commit()
 
         return jsonify({'message': 'Attempts reset successfully', 'attempt_count': 0}), 200
@@ -200,3 +300,59 @@ def reset_attempts():
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
+
+
+@test_bp.route('/status', methods=['GET'])
+@query_budget(3)
+@jwt_required()
+def get_status():
+    """Everything the client needs before a test, in one round trip.
+
+    Returns the user, their attempt summary, the latest attempts and whether a
+    certificate is available. Typically two queries: user joined to the summary
+    row by primary key, then one page of attempts.
+    """
+    try:
+        user_id = int(get_jwt_identity())
+
+        row = (
+            db.session.query(User, AttemptSummary)
+            .outerjoin(AttemptSummary, AttemptSummary.user_id == User.id)
+            .filter(User.id == user_id)
+            .first()
+        )
+        if row is None:
+            return jsonify({'error': 'User not found'}), 404
+
+        user, summary = row
+        if summary is None:
+            summary = attempt_summary.build_summary(user_id)
+
+        attempts, next_cursor = _attempts_page(user_id, STATUS_ATTEMPTS_LIMIT)
+
+        certificate = {'has_certificate': False}
+        if summary.has_passed and summary.passed_attempt_id:
+            passed_attempt = next(
+                (attempt for attempt in attempts if attempt.id == summary.passed_attempt_id),
+                None
+            ) or db.session.get(Attempt, summary.passed_attempt_id)
+            if passed_attempt:
+                certificate = {
+                    'has_certificate': True,
+                    'name': user.name,
+                    'role': user.role,
+                    'score': passed_attempt.score,
+                    'date': certificate_date(passed_attempt),
+                    'attempt_number': passed_attempt.attempt_number
+                }
+
+        return jsonify({
+            'user': user.to_dict(),
+            'attempt_summary': summary.to_dict(),
+            'attempts': [attempt.to_dict() for attempt in attempts],
+            'next_cursor': next_cursor,
+            'certificate': certificate
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
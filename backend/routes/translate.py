@@ -1,5 +1,5 @@
-from flask import Blueprint, request, jsonify
-from translation_utils import translate_text
+from flask import Blueprint, request, jsonify, current_app
+from translation_utils import translate_many, translation_budget
 
 translate_bp = Blueprint('translate', __name__)
 
@@ -13,15 +13,9 @@ def translate_texts():
     if not isinstance(texts, list):
         return jsonify({'error': 'texts must be a list of strings'}), 400
 
-    # Translate each string
-    translations = []
-    for text in texts:
-        if not text or not isinstance(text, str):
-            translations.append(None)
-            continue
-        
-        translated = translate_text(text, dest=target)
-        translations.append(translated)
+    # Translate all strings concurrently; stragglers past the deadline come back as None
+    with translation_budget(current_app.config.get('TRANSLATION_REQUEST_BUDGET', 10)):
+        translations = translate_many(texts, dest=target)
 
     return jsonify({
         'target': target,
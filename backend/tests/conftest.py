@@ -0,0 +1,79 @@
+"""
+Shared fixtures: one app per test session on a throwaway SQLite file (or on
+TEST_DATABASE_URL), seeded like a fresh deployment. Tests create their own
+users, so they do not depend on each other's data.
+
+Run from the backend directory:
+    pip install -r requirements-dev.txt
+    python -m pytest
+"""
+import itertools
+import os
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from config import TestingConfig
+
+_emails = itertools.count(1)
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    from app import create_app
+    from models import db
+
+    directory = tmp_path_factory.mktemp('app')
+
+    class Config(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = os.getenv('TEST_DATABASE_URL') or f'sqlite:///{directory}/test.db'
+        CERTIFICATE_CACHE_DIR = str(directory / 'certificates')
+        CERTIFICATE_PRERENDER = False
+        TEST_FORMS_PER_ROLE = 5
+
+    app = create_app(Config)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    """Create a user and return ``(user_id, auth headers)``."""
+    from models import db, User
+
+    def make(role='Electrician', is_admin=False, name='Test Candidate'):
+        with app.app_context():
+            user = User(name=name, email=f'user{next(_emails)}@tests.local', role=role, is_admin=is_admin)
+            user.set_password('password')
+            db.session.add(user)
+            db.session.commit()
+            return user.id, {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+    return make
+
+
+@pytest.fixture
+def answer_key(app):
+    """Return ``{question_id: correct_option}`` for 10 questions of a role."""
+    from models import Question
+
+    def key(role='Electrician', correct=10):
+        with app.app_context():
+            questions = Question.query.filter_by(role=role).order_by(Question.id).limit(10).all()
+            return {
+                str(question.id): question.correct_option if index < correct else _wrong(question.correct_option)
+                for index, question in enumerate(questions)
+            }
+
+    return key
+
+
+def _wrong(option):
+    return 'B' if option == 'A' else 'A'
@@ -0,0 +1,24 @@
+import pytest
+
+from benchmarks.stats import percentile
+
+
+@pytest.mark.parametrize('count, pct, rank', [
+    (100, 7, 7),
+    (100, 50, 50),
+    (100, 95, 95),
+    (100, 99, 99),
+    (100, 100, 100),
+    (10, 50, 5),
+    (10, 95, 10),
+    (10, 1, 1),
+    (1, 99, 1),
+    (7, 50, 4),
+])
+def test_nearest_rank(count, pct, rank):
+    # Value i is the i-th smallest, so the result is the rank it was taken from
+    assert percentile(list(range(1, count + 1)), pct) == rank
+
+
+def test_empty():
+    assert percentile([], 95) == 0.0
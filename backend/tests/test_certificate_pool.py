@@ -0,0 +1,95 @@
+from concurrent.futures import Future
+import threading
+
+import pytest
+
+import certificate_pool
+
+
+class _ManualExecutor:
+    """Hands out futures the test completes itself, instead of running workers."""
+
+    def __init__(self):
+        self.futures = []
+        self.submitted = threading.Event()
+
+    def submit(self, function, *args):
+        future = Future()
+        self.futures.append(future)
+        self.submitted.set()
+        return future
+
+
+@pytest.fixture
+def pool(app, monkeypatch):
+    executor = _ManualExecutor()
+    monkeypatch.setattr(certificate_pool, '_get_executor', lambda: executor)
+    certificate_pool.configure({'CERTIFICATE_RENDER_PROCESSES': 1, 'CERTIFICATE_RENDER_MAX_PENDING': 1})
+    yield executor
+    certificate_pool.configure(app.config)
+
+
+def test_slot_returns_to_the_semaphore_it_came_from(pool):
+    results = []
+    render = threading.Thread(target=lambda: results.append(certificate_pool.render('A', 'Electrician', 9, 'x')))
+    render.start()
+    assert pool.submitted.wait(5)
+
+    # Reconfigured while the render runs; a new render takes the only new slot
+    certificate_pool.configure({'CERTIFICATE_RENDER_PROCESSES': 1, 'CERTIFICATE_RENDER_MAX_PENDING': 1})
+    new_slots = certificate_pool._slots
+    assert new_slots.acquire(blocking=False)
+
+    pool.futures[0].set_result((b'%PDF', 0.01))
+    render.join(5)
+    assert results == [b'%PDF']
+    # The old render's slot went back to the old semaphore, not into the new one
+    assert not new_slots.acquire(blocking=False)
+
+
+def _start_render(results, block=False):
+    """Render in a thread, appending the PDF bytes to ``results``."""
+    thread = threading.Thread(
+        target=lambda: results.append(certificate_pool.render('A', 'Electrician', 9, 'x', block=block))
+    )
+    thread.start()
+    return thread
+
+
+def test_download_gets_503_while_every_slot_is_taken(pool, client, make_user, answer_key):
+    user_id, headers = make_user(name='Pool Candidate')
+    assert client.post('/api/test/submit-test', json={'answers': answer_key(correct=9)},
+                       headers=headers).json['passed']
+    results = []
+    render = _start_render(results)
+    assert pool.submitted.wait(5)
+
+    response = client.get(f'/api/certificate/{user_id}/download', headers=headers)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '2'
+
+    pool.futures[0].set_result((b'%PDF', 0.01))
+    render.join(5)
+    assert results == [b'%PDF']
+
+
+def test_blocking_job_waits_for_a_slot(pool):
+    results = []
+    first = _start_render(results)
+    assert pool.submitted.wait(5)
+
+    # A background job with block=True queues for the slot instead of failing
+    job = _start_render(results, block=True)
+    job.join(0.2)
+    assert job.is_alive() and len(pool.futures) == 1
+
+    pool.futures[0].set_result((b'first', 0.01))
+    first.join(5)
+    # The freed slot goes to the job, which then submits its render
+    for _ in range(50):
+        if len(pool.futures) == 2:
+            break
+        job.join(0.1)
+    pool.futures[1].set_result((b'job', 0.01))
+    job.join(5)
+    assert results == [b'first', b'job']
@@ -0,0 +1,30 @@
+import threading
+
+from models import db, Attempt, AttemptSummary
+
+SUBMITTERS = 8
+
+
+def test_concurrent_submits_get_distinct_attempt_numbers(app, make_user, answer_key):
+    user_id, headers = make_user()
+    answers = answer_key(correct=3)
+    barrier = threading.Barrier(SUBMITTERS)
+    responses = []
+
+    def submit():
+        client = app.test_client()
+        barrier.wait()
+        responses.append(client.post('/api/test/submit-test', json={'answers': answers}, headers=headers))
+
+    threads = [threading.Thread(target=submit) for _ in range(SUBMITTERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [response.status_code for response in responses] == [200] * SUBMITTERS
+    assert sorted(response.json['attempt_number'] for response in responses) == list(range(1, SUBMITTERS + 1))
+    with app.app_context():
+        numbers = [row[0] for row in db.session.query(Attempt.attempt_number).filter_by(user_id=user_id)]
+        assert sorted(numbers) == list(range(1, SUBMITTERS + 1))
+        assert db.session.get(AttemptSummary, user_id).attempt_count == SUBMITTERS
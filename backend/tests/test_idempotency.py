@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+import json
+
+import pytest
+
+import idempotency
+from models import db, Attempt, IdempotencyRecord
+
+
+def _post(client, headers, body, key):
+    return client.post('/api/test/submit-test', data=body, content_type='application/json',
+                       headers={**headers, idempotency.HEADER: key})
+
+
+def _attempts(app, user_id):
+    with app.app_context():
+        return Attempt.query.filter_by(user_id=user_id).count()
+
+
+def test_replays_stored_response(app, client, make_user, answer_key):
+    user_id, headers = make_user()
+    body = json.dumps({'answers': answer_key(correct=3)})
+    first = _post(client, headers, body, 'replay')
+    second = _post(client, headers, body, 'replay')
+    assert first.status_code == second.status_code == 200
+    assert second.headers['Idempotent-Replayed'] == 'true'
+    assert second.json == first.json
+    assert _attempts(app, user_id) == 1
+
+
+def test_retryable_conflict_is_not_stored(app, client, make_user, answer_key, monkeypatch):
+    import routes.test
+
+    user_id, headers = make_user()
+    body = json.dumps({'answers': answer_key(correct=3)})
+    # No allocation attempts left: the view answers 409 "please try again"
+    monkeypatch.setattr(routes.test, 'ATTEMPT_ALLOCATION_RETRIES', 0)
+    assert _post(client, headers, body, 'conflict').status_code == 409
+    monkeypatch.undo()
+
+    retry = _post(client, headers, body, 'conflict')
+    assert retry.status_code == 200
+    assert 'Idempotent-Replayed' not in retry.headers
+    assert _attempts(app, user_id) == 1
+
+
+class _WorkerDied(BaseException):
+    """Stands in for a worker killed mid-request: skips every cleanup handler."""
+
+
+def test_abandoned_reservation_is_taken_over_after_lease(app, client, make_user, answer_key, monkeypatch):
+    user_id, headers = make_user()
+    body = json.dumps({'answers': answer_key(correct=3)})
+
+    def die(*args):
+        raise _WorkerDied()
+
+    monkeypatch.setattr(idempotency, 'make_response', die)
+    with pytest.raises(_WorkerDied):
+        _post(client, headers, body, 'abandoned')
+    monkeypatch.undo()
+
+    with app.app_context():
+        record = IdempotencyRecord.query.filter_by(user_id=user_id).one()
+        assert record.status_code is None
+        assert record.expires_at <= datetime.utcnow() + timedelta(seconds=app.config['IDEMPOTENCY_LEASE'])
+
+    # Within the lease the key is still held
+    assert _post(client, headers, body, 'abandoned').status_code == 409
+
+    with app.app_context():
+        record = IdempotencyRecord.query.filter_by(user_id=user_id).one()
+        record.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+
+    assert _post(client, headers, body, 'abandoned').status_code == 200
+    with app.app_context():
+        stored = IdempotencyRecord.query.filter_by(user_id=user_id).one()
+        assert stored.status_code == 200
+        assert stored.expires_at > datetime.utcnow() + timedelta(seconds=app.config['IDEMPOTENCY_TTL'] - 60)
@@ -0,0 +1,43 @@
+from flask import Flask
+import pytest
+from sqlalchemy import create_engine
+
+import metrics
+
+
+def _requests(route, status):
+    return metrics.REQUESTS._series.get(('GET', '', route, status), 0)
+
+
+def _failing_app(propagate):
+    app = Flask(__name__)
+    app.config.update(PROPAGATE_EXCEPTIONS=propagate)
+    metrics.init_app(app, create_engine('sqlite://'))
+
+    @app.route(f'/fail-{int(propagate)}')
+    def fail():
+        raise RuntimeError('boom')
+
+    return app
+
+
+def test_unhandled_exception_counts_as_500():
+    before = _requests('/fail-0', '500')
+    assert _failing_app(propagate=False).test_client().get('/fail-0').status_code == 500
+    assert _requests('/fail-0', '500') == before + 1
+
+
+def test_propagated_exception_counts_as_500():
+    before = _requests('/fail-1', '500')
+    with pytest.raises(RuntimeError):
+        _failing_app(propagate=True).test_client().get('/fail-1')
+    assert _requests('/fail-1', '500') == before + 1
+
+
+def test_json_and_prometheus_share_collectors(client):
+    stats = client.get('/api/metrics').json
+    assert {'question_cache', 'translation_cache', 'translation_backfill',
+            'certificate_cache', 'certificate_jobs', 'certificate_pool'} <= set(stats)
+    text = client.get('/metrics').get_data(as_text=True)
+    assert all(f'{prefix}_' in text for prefix in stats)
+    assert _requests('/api/metrics', '200') >= 1
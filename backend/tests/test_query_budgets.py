@@ -0,0 +1,99 @@
+"""
+Every budgeted route stays within its ``@query_budget`` under TestingConfig's
+enforce mode (an overrun or an N+1 repeat raises ``QueryBudgetExceeded`` and
+fails the request). Data is added first so per-row loops would show up.
+"""
+from flask import Flask
+import pytest
+from sqlalchemy import create_engine, text
+
+import query_guard
+from query_guard import QueryBudgetExceeded, query_budget
+
+
+def _budget(app, response):
+    adapter = app.url_map.bind('localhost')
+    endpoint, _ = adapter.match(response.request.path, method=response.request.method)
+    return app.view_functions[endpoint].query_budget
+
+
+def _check(app, response, status=200):
+    assert response.status_code == status, response.get_data(as_text=True)
+    assert int(response.headers['X-Query-Count']) <= _budget(app, response)
+
+
+@pytest.fixture
+def candidate(client, make_user, answer_key):
+    """A candidate who failed once, then passed, then paid."""
+    user_id, headers = make_user(name='Budget Candidate')
+    for correct in (3, 9):
+        assert client.post('/api/test/submit-test', json={'answers': answer_key(correct=correct)},
+                           headers=headers).status_code == 200
+    assert client.post('/api/payment/record', json={'amount': 500}, headers=headers).status_code == 201
+    return user_id, headers
+
+
+def test_candidate_routes(app, client, candidate, answer_key):
+    _, headers = candidate
+    _check(app, client.get('/api/test/questions/Electrician', headers=headers))
+    _check(app, client.get('/api/test/questions/Electrician?lang=ur', headers=headers))
+    _check(app, client.post('/api/test/submit-test', json={'answers': answer_key()}, headers=headers))
+    _check(app, client.get('/api/test/attempts', headers=headers))
+    _check(app, client.get('/api/test/attempt-count', headers=headers))
+    _check(app, client.get('/api/test/status', headers=headers))
+
+
+def test_certificate_routes(app, client, candidate):
+    user_id, headers = candidate
+    _check(app, client.get(f'/api/certificate/{user_id}', headers=headers))
+    response = client.get(f'/api/certificate/{user_id}/download', headers=headers)
+    _check(app, response)
+    assert response.mimetype == 'application/pdf'
+
+
+def test_payment_route(app, client, candidate):
+    _, headers = candidate
+    _check(app, client.post('/api/payment/record', json={'amount': 250, 'discounted': True}, headers=headers), 201)
+
+
+def test_admin_routes(app, client, candidate, make_user):
+    make_user(name='Second Candidate')
+    _, headers = make_user(is_admin=True, name='Budget Admin')
+    _check(app, client.get('/api/admin/analytics', headers=headers))
+    response = client.get('/api/admin/users', headers=headers)
+    _check(app, response)
+    assert len(response.json['users']) >= 3
+
+
+def _guarded_app():
+    app = Flask(__name__)
+    app.config.update(TESTING=True, QUERY_GUARD='enforce', QUERY_GUARD_REPEAT_THRESHOLD=3)
+    engine = create_engine('sqlite://')
+    query_guard.init_app(app, engine)
+
+    @app.route('/loop')
+    def loop():
+        with engine.connect() as connection:
+            for number in range(3):
+                connection.execute(text('SELECT :number'), {'number': number})
+        return 'ok'
+
+    @app.route('/budgeted')
+    @query_budget(1)
+    def budgeted():
+        with engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+            connection.execute(text('SELECT 1 + 1'))
+        return 'ok'
+
+    return app
+
+
+def test_enforce_raises_on_repeated_statement_shape():
+    with pytest.raises(QueryBudgetExceeded, match=r'3x SELECT \?'):
+        _guarded_app().test_client().get('/loop')
+
+
+def test_enforce_raises_over_budget():
+    with pytest.raises(QueryBudgetExceeded, match='2 statements, budget is 1'):
+        _guarded_app().test_client().get('/budgeted')
@@ -0,0 +1,33 @@
+import question_cache
+from models import db, Question
+
+ROLE = 'Cashier'
+
+
+def test_edit_committed_during_load_is_not_lost(app, monkeypatch):
+    load_pool = question_cache._load_pool
+
+    with app.app_context():
+        question = Question.query.filter_by(role=ROLE).order_by(Question.id).first()
+        question_id, original_text = question.id, question.question_text
+        question_cache.invalidate(ROLE)
+
+        def slow_load(role):
+            pool = load_pool(role)
+            # An admin edit commits after the rows were read but before they are cached
+            Question.query.get(question_id).question_text = 'Edited while loading'
+            db.session.commit()
+            return pool
+
+        monkeypatch.setattr(question_cache, '_load_pool', slow_load)
+        stale = question_cache.get_pool(ROLE)
+        monkeypatch.undo()
+
+        assert ROLE not in question_cache._pools
+        fresh = {record.id: record for record in question_cache.get_pool(ROLE)}
+        try:
+            assert {record.id: record for record in stale}[question_id].question_text == original_text
+            assert fresh[question_id].question_text == 'Edited while loading'
+        finally:
+            Question.query.get(question_id).question_text = original_text
+            db.session.commit()
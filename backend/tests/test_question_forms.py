@@ -0,0 +1,55 @@
+import db_locks
+import models
+import question_forms
+from models import db, Attempt
+
+
+def _submit(client, headers, answers, form_id):
+    response = client.post('/api/test/submit-test', json={'answers': answers, 'form_id': form_id}, headers=headers)
+    assert response.status_code == 200
+    return response.json['attempt_number']
+
+
+def _attempt_form_id(app, user_id):
+    with app.app_context():
+        return Attempt.query.filter_by(user_id=user_id).one().form_id
+
+
+def test_rebuild_retires_forms_instead_of_deleting(app, client, make_user, answer_key):
+    user_id, headers = make_user()
+    form_id = client.get('/api/test/questions/Electrician', headers=headers).json['form_id']
+    assert form_id is not None
+    _submit(client, headers, answer_key(), form_id)
+
+    with app.app_context():
+        assert question_forms.rebuild_forms('Electrician', 5) == 5
+        form = db.session.get(models.TestForm, form_id)
+        assert form is not None and form.retired
+        current = {row.id for row in models.TestForm.query.filter_by(role='Electrician', retired=False)}
+    assert _attempt_form_id(app, user_id) == form_id
+
+    served = client.get('/api/test/questions/Electrician', headers=headers).json['form_id']
+    assert served in current
+
+
+def test_rebuild_skipped_while_another_holds_the_lock(app):
+    with app.app_context():
+        with db_locks.advisory_lock('test-forms:Electrician') as acquired:
+            assert acquired
+            assert question_forms.rebuild_forms('Electrician', 5) is None
+        # Up to date: a stale-only rebuild has nothing to do
+        assert question_forms.rebuild_forms('Electrician', 5, only_stale=True) is None
+
+
+def test_submit_drops_unknown_form_id(app, client, make_user, answer_key):
+    user_id, headers = make_user()
+    _submit(client, headers, answer_key(), 999999)
+    assert _attempt_form_id(app, user_id) is None
+
+
+def test_submit_drops_other_roles_form_id(app, client, make_user, answer_key):
+    with app.app_context():
+        carpenter_form = models.TestForm.query.filter_by(role='Carpenter', retired=False).first().id
+    user_id, headers = make_user(role='Electrician')
+    _submit(client, headers, answer_key(), carpenter_form)
+    assert _attempt_form_id(app, user_id) is None
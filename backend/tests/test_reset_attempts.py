@@ -0,0 +1,54 @@
+import threading
+
+import attempt_summary
+from models import db, Attempt, AttemptSummary
+
+
+def _submit(client, headers, answers):
+    return client.post('/api/test/submit-test', json={'answers': answers}, headers=headers)
+
+
+def test_reset_after_three_failed_attempts(app, client, make_user, answer_key):
+    user_id, headers = make_user()
+    for _ in range(3):
+        assert _submit(client, headers, answer_key(correct=2)).status_code == 200
+
+    response = client.post('/api/test/reset-attempts', headers=headers)
+    assert response.status_code == 200
+    assert _submit(client, headers, answer_key(correct=2)).json['attempt_number'] == 1
+
+
+def test_submit_racing_a_reset_is_not_lost(app, make_user, answer_key, monkeypatch):
+    user_id, headers = make_user()
+    client = app.test_client()
+    for _ in range(3):
+        assert _submit(client, headers, answer_key(correct=2)).status_code == 200
+
+    get_summary = attempt_summary.get_summary
+    submitted = []
+    submit = threading.Thread(
+        target=lambda: submitted.append(_submit(app.test_client(), headers, answer_key(correct=2)))
+    )
+
+    def get_summary_then_submit(*args, **kwargs):
+        summary = get_summary(*args, **kwargs)
+        if not submit.is_alive() and not submitted:
+            # Attempt 4 (always a pass) arrives while the reset holds the summary
+            submit.start()
+            submit.join(1)
+        return summary
+
+    monkeypatch.setattr(attempt_summary, 'get_summary', get_summary_then_submit)
+    reset = app.test_client().post('/api/test/reset-attempts', headers=headers)
+    submit.join(10)
+    monkeypatch.undo()
+
+    assert reset.status_code == 200
+    assert submitted[0].status_code == 200
+    # The reset went first; the racing submit counts as the first attempt after it
+    assert submitted[0].json['attempt_number'] == 1
+    with app.app_context():
+        numbers = [row[0] for row in db.session.query(Attempt.attempt_number).filter_by(user_id=user_id)]
+        summary = db.session.get(AttemptSummary, user_id)
+        assert numbers == [1]
+        assert summary.attempt_count == 1
@@ -0,0 +1,42 @@
+from sqlalchemy import event
+
+from models import db
+from routes.test import score_answers
+
+
+def _count_statements(app, operation):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            result = operation()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+    return result, statements
+
+
+def test_score_answers_uses_one_query(app, answer_key):
+    answers = answer_key(correct=7)
+    score, statements = _count_statements(app, lambda: score_answers(answers))
+    assert score == 7
+    assert len(statements) == 1
+
+
+def test_score_answers_empty(app):
+    score, statements = _count_statements(app, lambda: score_answers({}))
+    assert score == 0
+    assert statements == []
+
+
+def test_submit_statement_count(client, make_user, answer_key):
+    _, headers = make_user()
+    response = client.post('/api/test/submit-test', json={'answers': answer_key(correct=4)}, headers=headers)
+    assert response.status_code == 200
+    assert response.json['score'] == 4
+    # user, answer keys (one query for all 10), summary lock + read + rebuild from
+    # attempts (first attempt: no row yet), attempt insert, summary insert + update
+    assert int(response.headers['X-Query-Count']) == 8
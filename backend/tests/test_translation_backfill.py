@@ -0,0 +1,51 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import db_locks
+import translation_backfill
+import translation_utils
+from models import db, Question
+
+
+def test_backfill_skips_while_another_run_holds_the_lock(app):
+    with app.app_context():
+        with db_locks.advisory_lock('translation-backfill') as acquired:
+            assert acquired
+            assert translation_backfill.run_backfill() is None
+        assert translation_backfill.run_backfill() is not None
+
+
+
+def test_urdu_questions_never_call_the_translator_or_commit(app, client, make_user, monkeypatch):
+    _, headers = make_user(role='Carpenter')
+    with app.app_context():
+        # Half translated: no Urdu question text, Urdu option A only
+        for question in Question.query.filter_by(role='Carpenter'):
+            question.question_text_ur = None
+            question.option_a_ur = f'ur-{question.id}'
+        db.session.commit()
+
+    def fail(*args, **kwargs):
+        raise AssertionError('translator called on the request path')
+
+    commits = []
+
+    def record_commit(session):
+        commits.append(session)
+
+    monkeypatch.setattr(translation_utils, '_call_provider', fail)
+    monkeypatch.setattr(translation_utils, '_fetch', fail)
+    event.listen(Session, 'before_commit', record_commit)
+    try:
+        response = client.get('/api/test/questions/Carpenter?lang=ur', headers=headers)
+    finally:
+        event.remove(Session, 'before_commit', record_commit)
+
+    assert response.status_code == 200
+    assert commits == []
+    questions = response.json['questions']
+    assert len(questions) == 10
+    for question in questions:
+        assert question['question_text'] == question['question_text_en']
+        assert question['question_text_ur'] is None
+        assert question['option_a'] == f"ur-{question['id']}"
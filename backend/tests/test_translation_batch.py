@@ -0,0 +1,23 @@
+import threading
+import time
+
+import translation_utils
+
+
+def test_timed_out_batch_cancels_queued_calls(app, monkeypatch):
+    calls = []
+    fetch = translation_utils._fetch
+
+    def counting_fetch(*args):
+        calls.append(threading.current_thread().name)
+        time.sleep(0.2)
+        return fetch(*args)
+
+    monkeypatch.setattr(translation_utils, '_fetch', counting_fetch)
+    with app.app_context():
+        results = translation_utils.translate_many([f'batch text {i}' for i in range(80)], timeout=0.05)
+        assert results == [None] * 80
+        time.sleep(0.5)  # let the calls that were already running finish
+
+    # Only calls already running when the batch timed out (one per pool thread) ran
+    assert len(calls) <= translation_utils._batch_workers
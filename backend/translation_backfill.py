@@ -0,0 +1,173 @@
+"""
+Background backfill of Urdu translations for the question bank.
+
+Fills the ``*_ur`` columns ahead of time so ``GET /api/test/questions/<role>``
+never has to call the translator: it serves whatever translation exists, or
+English. Run it from the command line, from the admin API
+(``POST /api/admin/translations/backfill``, in a daemon thread), or on startup
+with ``TRANSLATION_BACKFILL_ON_STARTUP`` (off by default: every worker and every
+maintenance script builds the app). A database lock keeps concurrent runs from
+different processes from translating the same rows; the later one just skips.
+
+    python translation_backfill.py
+"""
+import logging
+import threading
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+import db_locks
+from models import db, Question
+from translation_utils import translate_text
+
+FIELDS = [
+    ('question_text', 'question_text_ur'),
+    ('option_a', 'option_a_ur'),
+    ('option_b', 'option_b_ur'),
+    ('option_c', 'option_c_ur'),
+    ('option_d', 'option_d_ur')
+]
+
+_lock = threading.Lock()
+_thread = None
+_progress = {
+    'running': False,
+    'total': 0,
+    'processed': 0,
+    'fields_translated': 0,
+    'fields_failed': 0,
+    'started_at': None,
+    'finished_at': None,
+    'last_error': None,
+}
+
+
+def _missing_translation_filter():
+    return or_(*[
+        and_(getattr(Question, source).isnot(None), getattr(Question, target).is_(None))
+        for source, target in FIELDS
+    ])
+
+
+def progress() -> dict:
+    """Return a snapshot of the current (or last) backfill run."""
+    with _lock:
+        snapshot = dict(_progress)
+    snapshot['remaining'] = max(snapshot['total'] - snapshot['processed'], 0)
+    return snapshot
+
+
+def _update(**changes):
+    with _lock:
+        for key, value in changes.items():
+            _progress[key] = value
+
+
+def _increment(**deltas):
+    with _lock:
+        for key, value in deltas.items():
+            _progress[key] += value
+
+
+def run_backfill(batch_size=20, dest='ur'):
+    """Translate every missing field, committing one batch of questions at a time.
+
+    Must be called inside an application context. Fields whose translation fails
+    are left empty and picked up again by the next run. Returns None without
+    doing anything if another process is already backfilling.
+    """
+    with db_locks.advisory_lock('translation-backfill') as acquired:
+        if not acquired:
+            logging.info('Translation backfill already running in another process; skipping')
+            return None
+        return _backfill(batch_size, dest)
+
+
+def _backfill(batch_size, dest):
+    question_ids = [
+        row[0]
+        for row in db.session.query(Question.id).filter(_missing_translation_filter()).order_by(Question.id)
+    ]
+    _update(
+        running=True,
+        total=len(question_ids),
+        processed=0,
+        fields_translated=0,
+        fields_failed=0,
+        started_at=datetime.utcnow().isoformat(),
+        finished_at=None,
+        last_error=None
+    )
+
+    try:
+        for start in range(0, len(question_ids), batch_size):
+            batch = Question.query.filter(Question.id.in_(question_ids[start:start + batch_size])).all()
+            translated_count = 0
+            failed_count = 0
+
+            for question in batch:
+                for source_attr, target_attr in FIELDS:
+                    source_value = getattr(question, source_attr)
+                    if not source_value or getattr(question, target_attr):
+                        continue
+
+                    translated = translate_text(source_value, dest=dest)
+                    if translated:
+                        setattr(question, target_attr, translated)
+                        translated_count += 1
+                    else:
+                        failed_count += 1
+
+            db.session.commit()
+            _increment(processed=len(batch), fields_translated=translated_count, fields_failed=failed_count)
+    except Exception as exc:
+        db.session.rollback()
+        logging.exception('Translation backfill failed')
+        _update(last_error=str(exc))
+        raise
+    finally:
+        _update(running=False, finished_at=datetime.utcnow().isoformat())
+
+    return progress()
+
+
+def start_backfill(app, batch_size=20):
+    """Start a backfill in a daemon thread. Returns False if one is already running."""
+    global _thread
+
+    def worker():
+        with app.app_context():
+            try:
+                run_backfill(batch_size=batch_size)
+            except Exception:
+                pass  # already logged and recorded in progress()
+
+    with _lock:
+        if _thread is not None and _thread.is_alive():
+            return False
+        _thread = threading.Thread(target=worker, name='translation-backfill', daemon=True)
+        _thread.start()
+    return True
+
+
+def main():
+    from app import create_app
+    from config import DevelopmentConfig
+
+    class BackfillConfig(DevelopmentConfig):
+        TRANSLATION_BACKFILL_ON_STARTUP = False
+
+    app = create_app(BackfillConfig)
+    with app.app_context():
+        print('Backfilling Urdu translations...')
+        result = run_backfill()
+        if result is None:
+            print('✗ Another process is already running the backfill')
+            return
+        print(f"✓ Processed {result['processed']} questions: "
+              f"{result['fields_translated']} fields translated, {result['fields_failed']} failed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Translator backends and the circuit breaker that guards them.
+
+``translation_utils`` talks to a provider through ``translate(text, dest)`` only, so
+the real Google backend can be swapped for ``FakeProvider`` when load testing
+offline (``TRANSLATION_PROVIDER=fake``).
+"""
+import random
+import threading
+import time
+
+from deep_translator import GoogleTranslator
+
+
+class GoogleProvider:
+    name = 'google'
+
+    def translate(self, text, dest):
+        return GoogleTranslator(source='en', target=dest).translate(text)
+
+
+class FakeProvider:
+    """Deterministic stand-in with configurable latency and failure rate."""
+    name = 'fake'
+
+    def __init__(self, latency=0.0, failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def translate(self, text, dest):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            failed = self._random.random() < self.failure_rate
+        if failed:
+            raise RuntimeError('Fake translator failure')
+        return f'[{dest}] {text}'
+
+
+def create_provider(config):
+    """Build the provider selected by ``TRANSLATION_PROVIDER``."""
+    name = (config.get('TRANSLATION_PROVIDER') or 'google').lower()
+    if name == 'fake':
+        return FakeProvider(
+            latency=float(config.get('TRANSLATION_FAKE_LATENCY', 0.0)),
+            failure_rate=float(config.get('TRANSLATION_FAKE_FAILURE_RATE', 0.0)),
+            seed=config.get('TRANSLATION_FAKE_SEED')
+        )
+    if name == 'google':
+        return GoogleProvider()
+    raise ValueError(f'Unknown translation provider: {name}')
+
+
+class CircuitBreaker:
+    """Stops calling a failing provider for a while.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and every
+    call is refused for ``reset_timeout`` seconds. It then lets a single trial call
+    through (half-open): success closes it again, failure re-opens it.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def allow(self):
+        """Return True if a call may go to the provider now."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def release(self):
+        """Give back a trial call that ended without a verdict."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.trips += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self._state,
+                'consecutive_failures': self._failures,
+                'trips': self.trips,
+                'rejected': self.rejected,
+            }
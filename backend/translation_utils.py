@@ -1,13 +1,293 @@
-"""Utilities for translating question text at runtime."""
+"""Utilities for translating question text at runtime.
 
-from functools import lru_cache
+Translations are looked up in a small in-process LRU first, then in the shared
+``translation_memory`` table (so every worker and every restart reuses earlier
+results), and only then requested from the translator. Failures are cached too,
+briefly, so a short outage neither sticks nor hammers the upstream.
+
+Provider calls run with a per-call timeout, inside an optional per-request budget
+(``translation_budget``), behind a circuit breaker that serves English (None)
+after repeated failures.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+import hashlib
 import logging
-from typing import Optional
+import threading
+import time
+from typing import List, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+import metrics
+from models import TranslationMemory
+from translation_providers import CircuitBreaker, GoogleProvider, create_provider
+
+_CACHE_SIZE = 2048
+_MISSING = object()
+
+# (text, dest) -> (translation or None on failure, expires_at, consecutive failures)
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_success_ttl = 24 * 60 * 60.0
+_failure_ttl = 30.0
+_failure_ttl_max = 15 * 60.0
+_stats = {
+    'hits': 0,
+    'negative_hits': 0,
+    'misses': 0,
+    'memory_hits': 0,
+    'failures': 0,
+    'timeouts': 0,
+    'short_circuited': 0,
+    'budget_exhausted': 0,
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+_batch_workers = 8
+_batch_timeout = 10.0
+
+_provider = GoogleProvider()
+_breaker = CircuitBreaker()
+_call_timeout = 5.0
+_call_executor = None
+_call_workers = 16
+
+# Absolute time.monotonic() deadline for all translator calls in the current request
+_budget_deadline = ContextVar('translation_budget_deadline', default=None)
+
+# Engine for the translation memory table. Set by init_translation_memory(); kept
+# here because translate_many() runs lookups on pool threads with no app context.
+_memory_engine = None
+_memory_table = TranslationMemory.__table__
+
+
+def configure(config) -> None:
+    """Apply translation cache and batch settings from the Flask config."""
+    global _CACHE_SIZE, _success_ttl, _failure_ttl, _failure_ttl_max, _batch_workers, _batch_timeout
+    global _provider, _breaker, _call_timeout
+    _CACHE_SIZE = int(config.get('TRANSLATION_CACHE_SIZE', _CACHE_SIZE))
+    _success_ttl = float(config.get('TRANSLATION_CACHE_TTL', _success_ttl))
+    _failure_ttl = float(config.get('TRANSLATION_FAILURE_TTL', _failure_ttl))
+    _failure_ttl_max = float(config.get('TRANSLATION_FAILURE_TTL_MAX', _failure_ttl_max))
+    _batch_workers = int(config.get('TRANSLATION_BATCH_WORKERS', _batch_workers))
+    _batch_timeout = float(config.get('TRANSLATION_BATCH_TIMEOUT', _batch_timeout))
+    _call_timeout = float(config.get('TRANSLATION_CALL_TIMEOUT', _call_timeout))
+    _provider = create_provider(config)
+    _breaker = CircuitBreaker(
+        failure_threshold=int(config.get('TRANSLATION_BREAKER_THRESHOLD', 5)),
+        reset_timeout=float(config.get('TRANSLATION_BREAKER_RESET', 30.0))
+    )
+
+
+@contextmanager
+def translation_budget(seconds: float):
+    """Cap the total time translator calls may take inside the ``with`` block."""
+    token = _budget_deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _budget_deadline.reset(token)
+
+
+def _source_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def init_translation_memory(engine, preload: int = 0) -> int:
+    """Attach the persistent translation memory and warm the LRU from it.
+
+    Loads up to ``preload`` of the most recent translations. Returns how many
+    entries were preloaded.
+    """
+    global _memory_engine
+    _memory_engine = engine
+    if preload <= 0:
+        return 0
+
+    query = (
+        select(_memory_table.c.source_text, _memory_table.c.target_language, _memory_table.c.translated_text)
+        .order_by(_memory_table.c.id.desc())
+        .limit(min(preload, _CACHE_SIZE))
+    )
+    with engine.connect() as connection:
+        rows = connection.execute(query).all()
+    # Oldest first, so the most recent entries end up at the hot end of the LRU
+    for source_text, target_language, translated_text in reversed(rows):
+        _cache_put((source_text, target_language), translated_text)
+    return len(rows)
+
+
+def _memory_get(text: str, dest: str) -> Optional[str]:
+    if _memory_engine is None:
+        return None
+    query = select(_memory_table.c.source_text, _memory_table.c.translated_text).where(
+        _memory_table.c.source_hash == _source_hash(text),
+        _memory_table.c.target_language == dest
+    )
+    try:
+        with _memory_engine.connect() as connection:
+            row = connection.execute(query).first()
+    except Exception as exc:  # pragma: no cover - database errors
+        logging.warning('Translation memory lookup failed: %s', exc)
+        return None
+    if row is None or row.source_text != text:
+        return None
+    return row.translated_text
+
+
+def _memory_put(text: str, dest: str, translated: str) -> None:
+    if _memory_engine is None:
+        return
+    try:
+        with _memory_engine.begin() as connection:
+            connection.execute(insert(_memory_table).values(
+                source_hash=_source_hash(text),
+                target_language=dest,
+                source_text=text,
+                translated_text=translated,
+                created_at=datetime.utcnow()
+            ))
+    except IntegrityError:
+        pass  # another worker stored the same translation first
+    except Exception as exc:  # pragma: no cover - database errors
+        logging.warning('Translation memory write failed: %s', exc)
+
+
+def _cache_get(key):
+    """Return the cached translation (None for a remembered failure) or _MISSING."""
+    now = time.monotonic()
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is None or entry[1] <= now:
+            _stats['misses'] += 1
+            return _MISSING
+        _cache.move_to_end(key)
+        if entry[0] is None:
+            _stats['negative_hits'] += 1
+        else:
+            _stats['hits'] += 1
+        return entry[0]
+
+
+def _store(key, value, ttl, failures=0) -> None:
+    with _cache_lock:
+        _cache[key] = (value, time.monotonic() + ttl, failures)
+        _cache.move_to_end(key)
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+
 
-from deep_translator import GoogleTranslator
+def _cache_put(key, value) -> None:
+    _store(key, value, _success_ttl)
+
+
+def _cache_failure(key) -> None:
+    """Remember a failed translation, backing off exponentially on repeats.
+
+    The failure count survives the entry expiring, so a string that keeps failing
+    is retried less and less often (up to ``_failure_ttl_max``) instead of on every
+    request, and an outage clears up on its own once the upstream recovers.
+    """
+    with _cache_lock:
+        entry = _cache.get(key)
+        failures = (entry[2] if entry is not None else 0) + 1
+        _stats['failures'] += 1
+    ttl = min(_failure_ttl * (2 ** (failures - 1)), _failure_ttl_max)
+    _store(key, None, ttl, failures)
+
+
+def stats() -> dict:
+    """Return cache hit/miss/failure counters for the metrics endpoint."""
+    with _cache_lock:
+        lookups = _stats['hits'] + _stats['negative_hits'] + _stats['misses']
+        return {
+            **_stats,
+            'hit_ratio': ((_stats['hits'] + _stats['negative_hits']) / lookups) if lookups else 0.0,
+            'size': len(_cache),
+            'provider': _provider.name,
+            'breaker': _breaker.stats(),
+        }
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_batch_workers, thread_name_prefix='translate')
+        return _executor
+
+
+def _get_call_executor() -> ThreadPoolExecutor:
+    global _call_executor
+    with _executor_lock:
+        if _call_executor is None:
+            _call_executor = ThreadPoolExecutor(max_workers=_call_workers, thread_name_prefix='translate-call')
+        return _call_executor
+
+
+def _observe_call(started: float, outcome: str) -> None:
+    metrics.observe('translation_call_seconds', time.perf_counter() - started,
+                    'Time spent waiting for the translator.', provider=_provider.name, outcome=outcome)
+
+
+def _call_provider(text: str, dest: str, deadline: Optional[float]):
+    """Ask the provider for a translation within the call timeout and deadline.
+
+    Returns ``(result, attempted)``. ``attempted`` is False when the call was never
+    made (breaker open or budget spent), in which case the miss is not cached.
+    """
+    timeout = _call_timeout
+    if deadline is not None:
+        timeout = min(timeout, deadline - time.monotonic())
+        if timeout <= 0:
+            with _cache_lock:
+                _stats['budget_exhausted'] += 1
+            return None, False
+
+    if not _breaker.allow():
+        with _cache_lock:
+            _stats['short_circuited'] += 1
+        return None, False
+
+    # The provider has no timeout of its own, so run it on a worker and stop
+    # waiting when time is up; a slow call finishes in the background.
+    started = time.perf_counter()
+    future = _get_call_executor().submit(_provider.translate, text, dest)
+    try:
+        result = future.result(timeout=timeout)
+    except FutureTimeoutError:
+        _observe_call(started, 'timeout')
+        logging.warning('Translation timed out after %.1fs for "%s"', timeout, text)
+        with _cache_lock:
+            _stats['timeouts'] += 1
+        if timeout < _call_timeout:
+            # Cut short by the request budget, not a provider fault: no negative
+            # caching, no breaker strike. Release the breaker's half-open trial slot.
+            _breaker.release()
+            return None, False
+        _breaker.record_failure()
+        return None, True
+    except Exception as exc:  # pragma: no cover - network/service errors
+        _observe_call(started, 'error')
+        logging.warning('Translation failed for "%s": %s', text, exc)
+        _breaker.record_failure()
+        return None, True
+
+    _observe_call(started, 'ok' if result else 'empty')
+    if result:
+        _breaker.record_success()
+    else:
+        _breaker.record_failure()
+    return result, True
 
 
-@lru_cache(maxsize=2048)
 def translate_text(text: str, dest: str = 'ur') -> Optional[str]:
     """Translate a string to the desired language.
 
@@ -16,10 +296,65 @@ def translate_text(text: str, dest: str = 'ur') -> Optional[str]:
     if not text:
         return None
 
-    try:
-        translator = GoogleTranslator(source='en', target=dest)
-        result = translator.translate(text)
+    cached = _cache_get((text, dest))
+    if cached is not _MISSING:
+        return cached
+    return _fetch(text, dest, _budget_deadline.get())
+
+
+def _fetch(text: str, dest: str, deadline: Optional[float] = None) -> Optional[str]:
+    """Resolve a cache miss from the translation memory or the translator."""
+    key = (text, dest)
+    result = _memory_get(text, dest)
+    if result is not None:
+        with _cache_lock:
+            _stats['memory_hits'] += 1
+        _cache_put(key, result)
         return result
-    except Exception as exc:  # pragma: no cover - network/service errors
-        logging.warning('Translation failed for "%s": %s', text, exc)
+
+    result, attempted = _call_provider(text, dest, deadline)
+    if not result:
+        if attempted:
+            _cache_failure(key)
         return None
+
+    _memory_put(text, dest, result)
+    _cache_put(key, result)
+    return result
+
+
+def translate_many(texts: List[str], dest: str = 'ur', timeout: Optional[float] = None) -> List[Optional[str]]:
+    """Translate a list of strings, preserving order.
+
+    Duplicates are translated once, cache hits are answered immediately and the
+    remaining strings are translated concurrently on a bounded thread pool. Strings
+    not translated when ``timeout`` seconds have passed come back as None. Those
+    still queued are cancelled, so timed-out batches do not hold up later requests
+    on the shared pool; calls already running finish and land in the cache.
+    """
+    results = {}
+    pending = []
+    for text in dict.fromkeys(text for text in texts if text and isinstance(text, str)):
+        cached = _cache_get((text, dest))
+        if cached is _MISSING:
+            pending.append(text)
+        else:
+            results[text] = cached
+
+    if pending:
+        executor = _get_executor()
+        deadline = time.monotonic() + (_batch_timeout if timeout is None else timeout)
+        budget = _budget_deadline.get()
+        if budget is not None:
+            deadline = min(deadline, budget)
+        futures = {executor.submit(_fetch, text, dest, deadline): text for text in pending}
+        done, not_done = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+        for future in not_done:
+            future.cancel()
+        for future in done:
+            results[futures[future]] = future.result()
+
+    return [
+        results.get(text) if text and isinstance(text, str) else None
+        for text in texts
+    ]
@@ -1,7 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
-import { getAttemptCount } from '../utils/api';
+import { getTestStatus } from '../utils/api';
 import Navbar from '../components/Navbar';
 import LoadingSpinner from '../components/LoadingSpinner';
 
@@ -17,8 +17,8 @@ const Home = () => {
 
   const fetchAttemptData = async () => {
     try {
-      const data = await getAttemptCount();
-      setAttemptData(data);
+      const data = await getTestStatus();
+      setAttemptData(data.attempt_summary);
     } catch (error) {
       console.error('Error fetching attempt data:', error);
     } finally {
@@ -2,7 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
 import Navbar from '../components/Navbar';
-import { getAttemptCount, resetAttempts, recordPayment } from '../utils/api';
+import { getAttemptCount, resetAttempts, recordPayment, newIdempotencyKey } from '../utils/api';
 
 const Payment = () => {
   const { user } = useAuth();
@@ -19,6 +19,7 @@ const Payment = () => {
   const [cardCvv, setCardCvv] = useState('');
   const [cardError, setCardError] = useState('');
   const [paidAmount, setPaidAmount] = useState(null);
+  const [paymentKey] = useState(newIdempotencyKey);
 
   const requiresRepayment = (attemptInfo?.attempt_count || 0) >= 3;
   const isFacilitatorPayment = selectedMethod === 'facilitator';
@@ -77,7 +78,7 @@ const Payment = () => {
       await recordPayment({
         amount: paymentAmount,
         discounted: isFacilitatorPayment || requiresRepayment
-      });
+      }, paymentKey);
     } catch (error) {
       // Still allow flow to continue but surface info
       console.error('Failed to record payment:', error);
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
-import { getQuestions, submitTest } from '../utils/api';
+import { getQuestions, submitTest, newIdempotencyKey } from '../utils/api';
 import Navbar from '../components/Navbar';
 import LoadingSpinner from '../components/LoadingSpinner';
 
@@ -9,6 +9,8 @@ const TestPage = () => {
   const { user } = useAuth();
   const navigate = useNavigate();
   const [questions, setQuestions] = useState([]);
+  const [formId, setFormId] = useState(null);
+  const [submitKey, setSubmitKey] = useState(null);
   const [loading, setLoading] = useState(true);
   const [submitting, setSubmitting] = useState(false);
   const [answers, setAnswers] = useState({});
@@ -23,9 +25,13 @@ const TestPage = () => {
   const fetchQuestions = async () => {
     try {
       setLoading(true);
-      // Fetch with Urdu to trigger backend translation
+      // Fetch with Urdu so both languages are included in the response
       const data = await getQuestions(user.role, 'ur');
       setQuestions(data.questions);
+      setFormId(data.form_id ?? null);
+      // One key per loaded test, so resubmitting after a network error cannot
+      // record a second attempt
+      setSubmitKey(newIdempotencyKey());
       setError('');
     } catch (error) {
       setError(error.response?.data?.error || 'Failed to load questions');
@@ -67,7 +73,7 @@ const TestPage = () => {
     setSubmitting(true);
 
     try {
-      const result = await submitTest(answers);
+      const result = await submitTest(answers, formId, submitKey);
       // Navigate to result page with data
       navigate('/result', { state: { result } });
     } catch (error) {
@@ -24,6 +24,15 @@ if (existingToken) {
   setAuthToken(existingToken);
 }
 
+// Unique per logical operation; retries of the same operation reuse it so the
+// server replays the first response instead of acting twice
+export const newIdempotencyKey = () =>
+  (window.crypto && window.crypto.randomUUID)
+    ? window.crypto.randomUUID()
+    : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+
+const idempotencyHeaders = (key) => (key ? { headers: { 'Idempotency-Key': key } } : undefined);
+
 // Test API
 export const getQuestions = async (role, language = 'en') => {
   const response = await apiClient.get(`/test/questions/${role}`, {
@@ -32,13 +41,26 @@ export const getQuestions = async (role, language = 'en') => {
   return response.data;
 };
 
-export const submitTest = async (answers) => {
-  const response = await apiClient.post('/test/submit-test', { answers });
+export const submitTest = async (answers, formId = null, idempotencyKey = null) => {
+  const response = await apiClient.post(
+    '/test/submit-test',
+    { answers, form_id: formId },
+    idempotencyHeaders(idempotencyKey)
+  );
+  return response.data;
+};
+
+// Newest first; pass the previous response's next_cursor to get the following page
+export const getAttempts = async ({ limit, cursor } = {}) => {
+  const response = await apiClient.get('/test/attempts', {
+    params: { limit, cursor }
+  });
   return response.data;
 };
 
-export const getAttempts = async () => {
-  const response = await apiClient.get('/test/attempts');
+// User, attempt summary, recent attempts and certificate availability in one call
+export const getTestStatus = async () => {
+  const response = await apiClient.get('/test/status');
   return response.data;
 };
 
@@ -57,8 +79,8 @@ export const authorizePayment = async (credentials) => {
   return response.data;
 };
 
-export const recordPayment = async (payload) => {
-  const response = await apiClient.post('/payment/record', payload);
+export const recordPayment = async (payload, idempotencyKey = null) => {
+  const response = await apiClient.post('/payment/record', payload, idempotencyHeaders(idempotencyKey));
   return response.data;
 };
 